@@ -0,0 +1,24 @@
+"""Timeouts for cache entries that every worker must agree on.
+
+Version counters, unread counts and purchase sets are invalidated by deleting
+or bumping a key in the default cache. That only reaches other workers when
+the backend is shared (Redis, memcached, file or database cache); with the
+per-process ``LocMemCache`` such entries are capped at
+``LOCAL_CACHE_TIMEOUT`` seconds, so other workers notice a write within that
+time instead of never.
+"""
+from django.conf import settings
+
+PROCESS_LOCAL_BACKENDS = ('django.core.cache.backends.locmem.LocMemCache',)
+
+
+def is_shared():
+    return settings.CACHES['default']['BACKEND'] not in PROCESS_LOCAL_BACKENDS
+
+
+def coherent_timeout(timeout):
+    """``timeout`` (``None`` meaning forever) for a shared cache, capped at ``LOCAL_CACHE_TIMEOUT`` otherwise."""
+    if is_shared():
+        return timeout
+    local = settings.LOCAL_CACHE_TIMEOUT
+    return local if timeout is None else min(timeout, local)
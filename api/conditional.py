@@ -0,0 +1,91 @@
+"""Conditional GET (``ETag``/``Last-Modified``/``304``) for read endpoints.
+
+A view describes what its response depends on with a cheap *stamp*: version
+counters, or one aggregate such as ``Count``/``Max(updated_at)``, never the
+query that builds the body. The ETag hashes that stamp with the request path,
+the negotiated media type and, for per-user data, the user. When the client
+already holds it the view answers ``304`` without serializing anything.
+
+Aggregates over a whole table get slower as it grows, so list stamps prefer a
+``ChangeCounter``: one row that writers bump inside their own transaction and
+readers fetch by name. The bump locks that row until commit, which serializes
+concurrent writers of the same counter; use it for tables that are read far
+more often than written.
+"""
+import hashlib
+
+from django.db.models import F
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from .models import ChangeCounter
+
+
+def bump_counter(name):
+    """Advance the ``name`` counter as part of the current transaction."""
+    if not ChangeCounter.objects.filter(name=name).update(value=F('value') + 1):
+        _, created = ChangeCounter.objects.get_or_create(name=name, defaults={'value': 1})
+        if not created:
+            ChangeCounter.objects.filter(name=name).update(value=F('value') + 1)
+
+
+def read_counters(*names):
+    """Current values of the named counters, ``0`` for ones never bumped."""
+    values = dict(ChangeCounter.objects.filter(name__in=names).values_list('name', 'value'))
+    return [values.get(name, 0) for name in names]
+
+
+class Stamp:
+    """Version parts of a response, plus its last modification time when one is known."""
+
+    def __init__(self, *parts, last_modified=None, per_user=False):
+        self.parts = parts
+        self.last_modified = last_modified
+        self.per_user = per_user
+
+
+def make_etag(request, stamp):
+    parts = [request.get_full_path(), getattr(request, 'accepted_media_type', ''), *stamp.parts]
+    if stamp.per_user:
+        parts.append(request.user.pk)
+    return quote_etag(hashlib.sha1(repr(parts).encode()).hexdigest())
+
+
+def conditional_response(request, stamp, build):
+    """Answer ``304`` if the client's copy matches ``stamp``, otherwise ``build()`` and tag it."""
+    if stamp is None or request.method not in ('GET', 'HEAD'):
+        return build()
+    etag = make_etag(request, stamp)
+    last_modified = int(stamp.last_modified.timestamp()) if stamp.last_modified else None
+    not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if not_modified is not None:
+        return not_modified
+
+    response = build()
+    if response.status_code == 200:
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+    return response
+
+
+class ConditionalGetMixin:
+    """Conditional ``list``/``retrieve`` for viewsets; override the ``get_*_stamp`` hooks."""
+
+    def get_list_stamp(self, request):
+        return None
+
+    def get_detail_stamp(self, request):
+        return None
+
+    def list(self, request, *args, **kwargs):
+        return conditional_response(
+            request, self.get_list_stamp(request),
+            lambda: super(ConditionalGetMixin, self).list(request, *args, **kwargs),
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return conditional_response(
+            request, self.get_detail_stamp(request),
+            lambda: super(ConditionalGetMixin, self).retrieve(request, *args, **kwargs),
+        )
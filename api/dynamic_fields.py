@@ -0,0 +1,128 @@
+"""Sparse fieldsets (``?fields=``) and expansion control (``?expand=``).
+
+``?fields=id,title,service.title`` keeps only the listed fields; dotted paths
+select fields of nested serializers. ``?expand=service,service.seller`` embeds
+only the listed relations and collapses every other expandable relation to its
+primary key(s). Without the parameters responses keep their full shape.
+
+Serializers opt in with ``DynamicFieldsMixin`` and describe their nested
+relations in ``expandable_fields``; views pass their queryset through
+``shape_queryset`` so ``select_related``/``prefetch_related`` follow the shape
+that was asked for.
+"""
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+
+FIELDS_PARAM = 'fields'
+EXPAND_PARAM = 'expand'
+
+
+def parse_paths(request, param):
+    if request is None or request.method not in SAFE_METHODS or param not in request.query_params:
+        return None
+    return {path.strip() for path in request.query_params[param].split(',') if path.strip()}
+
+
+def join_path(prefix, name):
+    return f'{prefix}.{name}' if prefix else name
+
+
+def selected_at(paths, prefix):
+    """Field names selected directly below ``prefix``, or ``None`` for all of them."""
+    if paths is None:
+        return None
+    if not prefix:
+        return {path.split('.')[0] for path in paths}
+    start = f'{prefix}.'
+    names = {path[len(start):].split('.')[0] for path in paths if path.startswith(start)}
+    return names or None
+
+
+def is_included(paths, path):
+    segments = path.split('.')
+    for depth, name in enumerate(segments):
+        names = selected_at(paths, '.'.join(segments[:depth]))
+        if names is not None and name not in names:
+            return False
+    return True
+
+
+def is_expanded(expand, path):
+    if expand is None:
+        return True
+    return path in expand or any(item.startswith(f'{path}.') for item in expand)
+
+
+class DynamicFieldsMixin:
+    """Apply ``?fields=``/``?expand=`` to this serializer and any nested ones.
+
+    ``expandable_fields`` maps a field name to ``{'relation': <orm name>,
+    'many': bool, 'serializer': <nested serializer class>}``; every key is
+    optional.
+    """
+    expandable_fields = {}
+
+    def get_field_path(self):
+        names = []
+        node = self
+        while node is not None:
+            if node.field_name:
+                names.append(node.field_name)
+            node = node.parent
+        return '.'.join(reversed(names))
+
+    def get_fields(self):
+        fields = super().get_fields()
+        request = self.context.get('request')
+        field_paths = parse_paths(request, FIELDS_PARAM)
+        expand = parse_paths(request, EXPAND_PARAM)
+        if field_paths is None and expand is None:
+            return fields
+
+        prefix = self.get_field_path()
+        names = selected_at(field_paths, prefix)
+        if names is not None:
+            fields = {name: field for name, field in fields.items() if name in names}
+
+        if expand is not None:
+            for name, spec in self.expandable_fields.items():
+                if name in fields and not is_expanded(expand, join_path(prefix, name)):
+                    options = {'many': spec.get('many', False), 'read_only': True}
+                    if spec.get('relation', name) != name:
+                        options['source'] = spec['relation']
+                    fields[name] = serializers.PrimaryKeyRelatedField(**options)
+        return fields
+
+
+def collect_relations(serializer_class, field_paths, expand, prefix='', orm_prefix=''):
+    selects, prefetches = [], []
+    for name, spec in getattr(serializer_class, 'expandable_fields', {}).items():
+        path = join_path(prefix, name)
+        if not is_included(field_paths, path):
+            continue
+        relation = orm_prefix + spec.get('relation', name)
+        if spec.get('many', False):
+            prefetches.append(relation)
+        elif is_expanded(expand, path):
+            selects.append(relation)
+            nested = spec.get('serializer')
+            if nested is not None:
+                nested_selects, nested_prefetches = collect_relations(
+                    nested, field_paths, expand, path, f'{relation}__'
+                )
+                selects += nested_selects
+                prefetches += nested_prefetches
+    return selects, prefetches
+
+
+def shape_queryset(queryset, serializer_class, request):
+    """Replace the queryset's related loading with what the requested shape needs."""
+    selects, prefetches = collect_relations(
+        serializer_class, parse_paths(request, FIELDS_PARAM), parse_paths(request, EXPAND_PARAM)
+    )
+    queryset = queryset.select_related(None).prefetch_related(None)
+    if selects:
+        queryset = queryset.select_related(*selects)
+    if prefetches:
+        queryset = queryset.prefetch_related(*prefetches)
+    return queryset
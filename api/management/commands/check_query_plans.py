@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand, CommandError
+from api.query_plans import check_hot_queries
+
+
+class Command(BaseCommand):
+    help = "EXPLAIN every hot filter path and fail if any of them is not served by its index."
+
+    def handle(self, *args, **options):
+        failures = 0
+        for name, error in check_hot_queries().items():
+            if error:
+                failures += 1
+                self.stdout.write(self.style.ERROR(f"FAIL {name}"))
+                self.stdout.write(error)
+            else:
+                self.stdout.write(self.style.SUCCESS(f"ok   {name}"))
+        if failures:
+            raise CommandError(f"{failures} hot queries are not served by their index.")
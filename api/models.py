@@ -1,3 +1,10 @@
 from django.db import models
 
-# Create your models here.
+
+class ChangeCounter(models.Model):
+    """A named counter that writers bump in the same transaction as their change (see ``api.conditional``)."""
+    name = models.CharField(max_length=100, unique=True)
+    value = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.name} = {self.value}"
@@ -0,0 +1,97 @@
+"""EXPLAIN-based checks that the hot filter paths are served by an index.
+
+Each entry in ``HOT_QUERIES`` builds the queryset a view actually runs and
+names the index that should serve it; the check fails unless the plan reads
+that index, so dropping it is caught even when a plain ForeignKey index
+would still avoid a full scan. On PostgreSQL the plan is taken with
+``enable_seqscan`` off, so the check is about whether the index is usable
+rather than what the planner prefers on a tiny table. Run it with
+``python manage.py check_query_plans`` or as part of ``api.tests``.
+"""
+from django.db import connection, transaction
+
+from notes.models import Note
+from notifications.models import Notification
+from orders.models import Order
+from reviews.models import Review
+from services.models import Service
+
+
+class QueryPlanError(AssertionError):
+    pass
+
+
+def foreign_key_index(model, field_name):
+    """Prefix of the index Django creates for a ForeignKey (its name ends in a hash)."""
+    return f"{model._meta.db_table}_{model._meta.get_field(field_name).column}_"
+
+
+# name -> (queryset builder, names of the indexes that should serve it; any one will do)
+HOT_QUERIES = {
+    'orders by buyer and status': (
+        lambda: Order.objects.filter(buyer_id=1, status='completed'),
+        ('order_buyer_status_idx',),
+    ),
+    'has ordered (buyer, service, completed)': (
+        lambda: Order.objects.filter(buyer_id=1, service_id=1, status='completed'),
+        ('order_completed_purchase_idx', 'order_service_buyer_status_idx'),
+    ),
+    'review eligibility (service, buyer, status)': (
+        lambda: Order.objects.filter(service_id=1, buyer_id=1, status='completed').order_by('-created_at'),
+        ('order_completed_purchase_idx', 'order_service_buyer_status_idx'),
+    ),
+    'notifications for user, newest first': (
+        lambda: Notification.objects.filter(user_id=1).order_by('-created_at')[:10],
+        ('notification_user_created_idx',),
+    ),
+    'unread notifications for user': (
+        lambda: Notification.objects.filter(user_id=1, is_read=False),
+        ('notification_unread_idx', 'notification_user_created_idx'),
+    ),
+    'reviews for service, newest first': (
+        lambda: Review.objects.filter(service_id=1).order_by('-created_at')[:10],
+        ('review_service_created_idx',),
+    ),
+    'notes for user, newest first': (
+        lambda: Note.objects.filter(user_id=1).order_by('-created_at')[:10],
+        ('note_user_created_idx',),
+    ),
+    'services by seller': (
+        lambda: Service.objects.filter(seller_id=1),
+        (foreign_key_index(Service, 'seller'),),
+    ),
+    'services in category by price': (
+        lambda: Service.objects.filter(category_id=1).order_by('price')[:10],
+        ('service_category_price_idx',),
+    ),
+}
+
+
+def explain(queryset):
+    if connection.vendor == 'postgresql':
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+            return queryset.explain()
+    return queryset.explain()
+
+
+def assert_uses_index(queryset, index_names):
+    """Raise ``QueryPlanError`` unless the plan for ``queryset`` reads one of ``index_names``."""
+    plan = explain(queryset)
+    if not any(name in plan for name in index_names):
+        table = queryset.model._meta.db_table
+        raise QueryPlanError(f"{table} is not read through {' or '.join(index_names)}:\n{plan}")
+    return plan
+
+
+def check_hot_queries():
+    """Return ``{name: error_or_None}`` for every hot query."""
+    results = {}
+    for name, (build, index_names) in HOT_QUERIES.items():
+        try:
+            assert_uses_index(build(), index_names)
+            results[name] = None
+        except QueryPlanError as exc:
+            results[name] = str(exc)
+    return results
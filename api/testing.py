@@ -0,0 +1,38 @@
+"""Helpers shared by the apps' test modules."""
+import time
+from contextlib import contextmanager
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+
+from services.models import Service
+
+
+def make_user(username, role='buyer', **extra):
+    return get_user_model().objects.create_user(
+        email=f'{username}@example.com', username=username, password='pw12345!x', role=role, **extra
+    )
+
+
+def make_service(seller, **fields):
+    fields = {'title': 'Logo', 'description': 'Logo design', 'price': 5, 'delivery_time': 3, **fields}
+    return Service.objects.create(seller=seller, **fields)
+
+
+def as_worker(name):
+    """Run the block against a process-local cache of its own, as another worker would.
+
+    ``override_settings(CACHES=...)`` gives every block a fresh cache
+    instance; blocks with the same ``name`` share its contents.
+    """
+    return override_settings(CACHES={'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': name,
+    }})
+
+
+@contextmanager
+def seconds_later(seconds):
+    """Make cache entries see the clock ``seconds`` ahead."""
+    with mock.patch('time.time', return_value=time.time() + seconds):
+        yield
@@ -1,3 +1,68 @@
-from django.test import TestCase
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
 
-# Create your tests here.
+from orders.models import Order
+from orders.serializers import OrderSerializer
+from .dynamic_fields import shape_queryset
+from .query_plans import HOT_QUERIES, QueryPlanError, assert_uses_index, check_hot_queries
+from .testing import make_service, make_user
+
+
+class QueryPlanTests(TestCase):
+    def test_hot_queries_use_their_indexes(self):
+        failures = {name: error for name, error in check_hot_queries().items() if error}
+        self.assertEqual(failures, {})
+
+
+class MissingIndexTests(TransactionTestCase):
+    def test_dropped_index_is_reported(self):
+        index = next(index for index in Order._meta.indexes if index.name == 'order_buyer_status_idx')
+        with connection.schema_editor() as editor:
+            editor.remove_index(Order, index)
+        try:
+            build, index_names = HOT_QUERIES['orders by buyer and status']
+            with self.assertRaises(QueryPlanError):
+                assert_uses_index(build(), index_names)
+        finally:
+            with connection.schema_editor() as editor:
+                editor.add_index(Order, index)
+
+
+class DynamicFieldsTests(TestCase):
+    def setUp(self):
+        self.seller = make_user('seller', 'seller')
+        self.buyer = make_user('buyer')
+        self.service = make_service(self.seller)
+        self.order = Order.objects.create(buyer=self.buyer, service=self.service)
+        self.client = APIClient()
+        self.client.force_authenticate(self.buyer)
+
+    def first_order(self, query):
+        return self.client.get(f'/api/v1/orders/?{query}').data['results'][0]
+
+    def relations(self, query):
+        request = Request(APIRequestFactory().get(f'/?{query}'))
+        queryset = shape_queryset(Order.objects.all(), OrderSerializer, request)
+        return queryset.query.select_related, queryset._prefetch_related_lookups
+
+    def test_fields_keep_only_the_listed_paths(self):
+        self.assertEqual(set(self.first_order('fields=id,status')), {'id', 'status'})
+        self.assertEqual(self.first_order('fields=id,service.title')['service'], {'title': 'Logo'})
+
+    def test_expand_collapses_other_relations_to_keys(self):
+        self.assertEqual(self.first_order('expand=')['service'], self.service.pk)
+        service = self.first_order('expand=service')['service']
+        self.assertEqual(service['title'], 'Logo')
+        self.assertEqual(service['seller'], self.seller.pk)
+        self.assertEqual(self.first_order('expand=service.seller')['service']['seller']['id'], self.seller.pk)
+
+    def test_shape_queryset_loads_only_the_requested_relations(self):
+        self.assertEqual(self.relations('fields=id,status'), (False, ()))
+        self.assertEqual(self.relations('expand='), (False, ()))
+        self.assertEqual(self.relations('expand=service'), ({'service': {}}, ('service__images',)))
+        self.assertEqual(
+            self.relations('expand=service.seller'),
+            ({'service': {'seller': {}}}, ('service__images',)),
+        )
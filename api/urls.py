@@ -10,10 +10,10 @@ from users.views import (
 from services.views import ServiceViewSet, CategoryViewSet, ServiceImageViewSet
 from orders.views import (
     OrderViewSet, payment_success, create_checkout_session,
-    get_order_by_id, HasOrderedProduct
+    get_order_by_id, HasOrderedProduct, stripe_webhook
 )
 from notifications.views import NotificationViewSet
-from dashboard.views import AdminDashboardView
+from dashboard.views import AdminDashboardView, AdminAnalyticsView
 from reviews.views import ReviewViewSet
 
 from notes.views import NoteViewSet
@@ -49,6 +49,7 @@ urlpatterns = [
     path('buyer-dashboard/', BuyerDashboard.as_view(), name='buyer-dashboard'),
     path('seller-dashboard/', SellerDashboard.as_view(), name='seller-dashboard'),
     path('admin-dashboard/', AdminDashboardView.as_view(), name='admin-dashboard'),
+    path('admin-analytics/', AdminAnalyticsView.as_view(), name='admin-analytics'),
     path('freelancer-dashboard/', freelancer_dashboard, name='freelancer-dashboard'),
 
     # ✅ Order-specific & Stripe
@@ -57,6 +58,7 @@ urlpatterns = [
     path('orders/has-ordered/<int:service_id>/', HasOrderedProduct.as_view(), name='has-ordered'),
     path('create-checkout-session/', create_checkout_session, name='create-checkout'),
     path('payment-success/', payment_success, name='payment-success'),
+    path('stripe/webhook/', stripe_webhook, name='stripe-webhook'),
 
     # path('auth/users/reset_password/', CustomPasswordResetView.as_view(), name='password_reset'),
 
@@ -1,3 +1,5 @@
 from django.contrib import admin
-
+from dashboard.models import DailyOrderRollup, RollupState
 # Register your models here.
+admin.site.register(DailyOrderRollup)
+admin.site.register(RollupState)
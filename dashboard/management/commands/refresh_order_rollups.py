@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from dashboard import rollups
+
+
+class Command(BaseCommand):
+    help = "Fold orders changed since the last run into the daily analytics rollups."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rebuild', action='store_true', help="Drop and recompute every rollup row.")
+
+    def handle(self, *args, **options):
+        days = rollups.refresh(rebuild=options['rebuild'])
+        self.stdout.write(self.style.SUCCESS(f"Recomputed rollups for {days} days."))
@@ -1,3 +1,38 @@
 from django.db import models
+from django.contrib.auth import get_user_model
+from services.models import Category
 
-# Create your models here.
+User = get_user_model()
+
+
+class DailyOrderRollup(models.Model):
+    """Orders and revenue for one (day, category, seller), maintained by ``dashboard.rollups``."""
+    day = models.DateField()
+    category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    seller = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    orders = models.PositiveIntegerField(default=0)
+    completed_orders = models.PositiveIntegerField(default=0)
+    canceled_orders = models.PositiveIntegerField(default=0)
+    paid_orders = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    def __str__(self):
+        return f"{self.day} | seller {self.seller_id} | category {self.category_id}"
+
+    class Meta:
+        ordering = ['day']
+        indexes = [
+            models.Index(fields=['day'], name='rollup_day_idx'),
+            models.Index(fields=['seller', 'day'], name='rollup_seller_day_idx'),
+            models.Index(fields=['category', 'day'], name='rollup_category_day_idx'),
+        ]
+
+
+class RollupState(models.Model):
+    """High-water mark of ``Order.updated_at`` already folded into the rollups."""
+    name = models.CharField(max_length=50, unique=True)
+    high_water = models.DateTimeField(null=True, blank=True)
+    refreshed_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.name} @ {self.high_water}"
@@ -0,0 +1,103 @@
+"""Daily order/revenue rollups per (day, category, seller).
+
+``refresh`` finds the orders touched since the stored high-water mark of
+``Order.updated_at``, and recomputes every day those orders fall on from
+scratch (delete, then re-aggregate). Re-running a day is idempotent, so the
+window is widened by ``HIGH_WATER_OVERLAP`` to pick up transactions that
+committed after a later timestamp had already been seen. Deleted orders are
+only reflected by a ``rebuild``.
+
+Revenue is the price of paid orders' services at refresh time; orders do not
+store the price they were paid at.
+"""
+import datetime
+from functools import reduce
+from operator import or_
+
+from django.db import transaction
+from django.db.models import Count, Max, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from orders.models import Order
+from .models import DailyOrderRollup, RollupState
+
+STATE_NAME = 'orders'
+HIGH_WATER_OVERLAP = datetime.timedelta(minutes=5)
+DAYS_PER_BATCH = 31
+
+
+def day_bounds(day):
+    start = timezone.make_aware(datetime.datetime.combine(day, datetime.time.min))
+    return start, start + datetime.timedelta(days=1)
+
+
+def orders_on(days):
+    ranges = []
+    for day in days:
+        start, end = day_bounds(day)
+        ranges.append(Q(order_date__gte=start, order_date__lt=end))
+    return Order.objects.filter(reduce(or_, ranges))
+
+
+def aggregate(orders):
+    rows = (
+        orders.order_by()
+        .annotate(day=TruncDate('order_date'))
+        .values('day', 'service__category_id', 'service__seller_id')
+        .annotate(
+            orders=Count('pk'),
+            completed_orders=Count('pk', filter=Q(status=Order.COMPLETED)),
+            canceled_orders=Count('pk', filter=Q(status=Order.CANCELED)),
+            paid_orders=Count('pk', filter=Q(is_paid=True)),
+            revenue=Sum('service__price', filter=Q(is_paid=True)),
+        )
+    )
+    return [
+        DailyOrderRollup(
+            day=row['day'],
+            category_id=row['service__category_id'],
+            seller_id=row['service__seller_id'],
+            orders=row['orders'],
+            completed_orders=row['completed_orders'],
+            canceled_orders=row['canceled_orders'],
+            paid_orders=row['paid_orders'],
+            revenue=row['revenue'] or 0,
+        )
+        for row in rows
+    ]
+
+
+def recompute_days(days):
+    days = sorted(days)
+    for start in range(0, len(days), DAYS_PER_BATCH):
+        batch = days[start:start + DAYS_PER_BATCH]
+        DailyOrderRollup.objects.filter(day__in=batch).delete()
+        DailyOrderRollup.objects.bulk_create(aggregate(orders_on(batch)), batch_size=1000)
+
+
+def refresh(rebuild=False):
+    """Bring the rollups up to date; returns the number of days recomputed."""
+    with transaction.atomic():
+        state, _ = RollupState.objects.select_for_update().get_or_create(name=STATE_NAME)
+        changed = Order.objects.all()
+        if state.high_water is not None and not rebuild:
+            changed = changed.filter(updated_at__gt=state.high_water - HIGH_WATER_OVERLAP)
+
+        high_water = changed.aggregate(latest=Max('updated_at'))['latest']
+        days = set(
+            changed.order_by()
+            .annotate(day=TruncDate('order_date'))
+            .values_list('day', flat=True)
+            .distinct()
+        )
+        if rebuild:
+            DailyOrderRollup.objects.all().delete()
+        if days:
+            recompute_days(days)
+
+        if high_water is not None and (state.high_water is None or high_water > state.high_water):
+            state.high_water = high_water
+        state.refreshed_at = timezone.now()
+        state.save()
+    return len(days)
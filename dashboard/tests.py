@@ -1,3 +1,127 @@
+import csv
+import datetime
+import json
+from io import StringIO
+
+from django.core.management import call_command
 from django.test import TestCase
+from rest_framework.test import APIClient
+from django.utils import timezone
+
+from api.testing import make_service, make_user
+from orders import transitions
+from orders.models import Order
+from services.models import Category
+from . import rollups
+from .models import DailyOrderRollup, RollupState
+
+DAY = datetime.date(2025, 3, 10)
+
+
+def order_on(day, service, buyer, **fields):
+    order = Order.objects.create(service=service, buyer=buyer, **fields)
+    Order.objects.filter(pk=order.pk).update(order_date=rollups.day_bounds(day)[0] + datetime.timedelta(hours=12))
+    return order
+
+
+class RollupTests(TestCase):
+    def setUp(self):
+        self.seller = make_user('seller', 'seller')
+        self.buyer = make_user('buyer')
+        self.category = Category.objects.create(name='Design')
+        self.service = make_service(self.seller, category=self.category, price=10)
+
+    def totals(self, day):
+        row = DailyOrderRollup.objects.get(day=day, seller=self.seller, category=self.category)
+        return row.orders, row.completed_orders, row.canceled_orders, row.paid_orders, row.revenue
+
+    def test_refresh_aggregates_each_day(self):
+        order_on(DAY, self.service, self.buyer, status=Order.COMPLETED, is_paid=True)
+        order_on(DAY, self.service, self.buyer, status=Order.CANCELED)
+        order_on(DAY + datetime.timedelta(days=1), self.service, self.buyer)
+
+        self.assertEqual(rollups.refresh(), 2)
+        self.assertEqual(self.totals(DAY), (2, 1, 1, 1, 10))
+        self.assertEqual(self.totals(DAY + datetime.timedelta(days=1)), (1, 0, 0, 0, 0))
+
+    def test_refresh_recomputes_only_touched_days(self):
+        order = order_on(DAY, self.service, self.buyer)
+        order_on(DAY + datetime.timedelta(days=1), self.service, self.buyer)
+        rollups.refresh()
+
+        # Orders outside the overlap window are not rescanned.
+        high_water = timezone.now() - rollups.HIGH_WATER_OVERLAP * 2
+        Order.objects.update(updated_at=high_water - rollups.HIGH_WATER_OVERLAP * 2)
+        RollupState.objects.update(high_water=high_water)
+        transitions.transition(order.pk, Order.COMPLETED)
+
+        self.assertEqual(rollups.refresh(), 1)
+        self.assertEqual(self.totals(DAY), (1, 1, 0, 0, 0))
+        self.assertEqual(self.totals(DAY + datetime.timedelta(days=1)), (1, 0, 0, 0, 0))
+
+    def test_rebuild_drops_deleted_orders(self):
+        order = order_on(DAY, self.service, self.buyer)
+        order_on(DAY + datetime.timedelta(days=1), self.service, self.buyer)
+        rollups.refresh()
+        order.delete()
+
+        rollups.refresh()
+        self.assertTrue(DailyOrderRollup.objects.filter(day=DAY).exists())
+
+        call_command('refresh_order_rollups', '--rebuild', stdout=StringIO())
+        self.assertFalse(DailyOrderRollup.objects.filter(day=DAY).exists())
+        self.assertEqual(self.totals(DAY + datetime.timedelta(days=1)), (1, 0, 0, 0, 0))
+
+
+class DashboardStampTests(TestCase):
+    def setUp(self):
+        seller = make_user('seller', 'seller')
+        self.order = Order.objects.create(service=make_service(seller), buyer=make_user('buyer'))
+        self.client = APIClient()
+        self.client.force_authenticate(make_user('admin', is_staff=True))
+
+    def etag(self):
+        return self.client.get('/api/v1/admin-dashboard/')['ETag']
+
+    def test_etag_follows_order_writes_and_deletions(self):
+        first = self.etag()
+        self.assertEqual(self.etag(), first)
+        transitions.transition(self.order.pk, Order.COMPLETED)
+        second = self.etag()
+        self.assertNotEqual(second, first)
+        Order.objects.create(service=self.order.service, buyer=self.order.buyer).delete()
+        self.assertNotEqual(self.etag(), second)
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        self.seller = make_user('seller', 'seller')
+        self.category = Category.objects.create(name='Design')
+        service = make_service(self.seller, category=self.category, price='12.50')
+        self.orders = [Order.objects.create(service=service, buyer=make_user(f'buyer{n}')) for n in range(3)]
+        self.client = APIClient()
+        self.client.force_authenticate(make_user('admin', is_staff=True))
+
+    def export(self, export_format):
+        response = self.client.get(f'/api/v1/admin-dashboard/?export={export_format}')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content).decode()
+
+    def test_ndjson_has_one_object_per_order(self):
+        response, body = self.export('ndjson')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        rows = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual([row['id'] for row in rows], [order.pk for order in self.orders])
+        self.assertEqual(rows[0]['seller_email'], self.seller.email)
+        self.assertEqual((rows[0]['category'], rows[0]['service_price'], rows[0]['is_paid']), ('Design', '12.50', False))
+
+    def test_csv_has_a_header_and_one_row_per_order(self):
+        response, body = self.export('csv')
+        self.assertIn('attachment; filename="orders-', response['Content-Disposition'])
+        header, *rows = list(csv.reader(StringIO(body)))
+        self.assertEqual(header[:3], ['id', 'status', 'is_paid'])
+        self.assertEqual([int(row[0]) for row in rows], [order.pk for order in self.orders])
 
-# Create your tests here.
+    def test_unknown_formats_are_rejected(self):
+        self.assertEqual(self.client.get('/api/v1/admin-dashboard/?export=xml').status_code, 400)
@@ -1,19 +1,121 @@
+import datetime
+
+from django.db.models import Count, Max, Q, Sum
+from django.utils import timezone
+from django.utils.dateparse import parse_date
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAdminUser
+from rest_framework import status
 from orders.models import Order
 from orders.serializers import OrderSerializer
+from orders.signals import ORDER_DELETIONS_COUNTER
+from services.cache import catalog_state
+from services.customPagination import CustomPagination
+from api.conditional import Stamp, conditional_response, read_counters
+from .exports import EXPORT_FORMATS, export_response
+from . import rollups as order_rollups
+from .models import DailyOrderRollup, RollupState
 
 class AdminDashboardView(APIView):
+    """Order summary with a paginated order list.
+
+    ``?export=ndjson`` or ``?export=csv`` streams every order instead;
+    ``?pagination=cursor`` walks the list with keyset pages.
+    """
     permission_classes = [IsAdminUser]
+    pagination_class = CustomPagination
 
     def get(self, request):
-        orders = Order.objects.select_related('buyer', 'service__seller', 'service__category') 
-        serializer = OrderSerializer(orders, many=True)
-        return Response({
-            "total_orders": orders.count(),
-            "orders": serializer.data
-        })
+        export_format = request.query_params.get('export')
+        if export_format:
+            if export_format not in EXPORT_FORMATS:
+                return Response(
+                    {"error": f"Unsupported export format; use one of: {', '.join(EXPORT_FORMATS)}."},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            return export_response(export_format)
+        return conditional_response(request, self.get_stamp(), lambda: self.summary(request))
 
+    def get_stamp(self):
+        # New orders move the newest pk and every order write moves updated_at; both maxima
+        # are read off their indexes. Deletions and the embedded services have counters.
+        newest = Order.objects.order_by().aggregate(pk=Max('pk'), updated=Max('updated_at'))
+        return Stamp(newest['pk'], newest['updated'], *read_counters(ORDER_DELETIONS_COUNTER), *catalog_state())
 
+    def summary(self, request):
+        summary = Order.objects.order_by().aggregate(
+            total_orders=Count('pk'),
+            paid_orders=Count('pk', filter=Q(is_paid=True)),
+            **{f'{value}_orders': Count('pk', filter=Q(status=value)) for value, _ in Order.ORDER_STATUS_CHOICES},
+        )
 
+        orders = Order.objects.select_related(
+            'buyer', 'service__seller', 'service__category'
+        ).prefetch_related('service__images')
+        paginator = self.pagination_class()
+        page = paginator.paginate_queryset(orders, request, view=self)
+        serializer = OrderSerializer(page, many=True, context={'request': request})
+        response = paginator.get_paginated_response(serializer.data)
+        page_data = dict(response.data)
+        page_data['orders'] = page_data.pop('results')
+        response.data = {**summary, **page_data}
+        return response
+
+
+class AdminAnalyticsView(APIView):
+    """Orders and revenue from the daily rollups (see ``refresh_order_rollups``).
+
+    ``?start=``/``?end=`` bound the days (default: the last 30),
+    ``?group_by=day|category|seller`` picks the breakdown and ``?category=``/
+    ``?seller=`` narrow it. Never touches the orders table.
+    """
+    permission_classes = [IsAdminUser]
+    default_days = 30
+    groupings = {
+        'day': ['day'],
+        'category': ['category_id', 'category__name'],
+        'seller': ['seller_id', 'seller__email'],
+    }
+
+    def get(self, request):
+        refreshed_at = RollupState.objects.filter(name=order_rollups.STATE_NAME).values_list('refreshed_at', flat=True).first()
+        stamp = Stamp(refreshed_at, timezone.localdate(), last_modified=refreshed_at)
+        return conditional_response(request, stamp, lambda: self.report(request, refreshed_at))
+
+    def report(self, request, refreshed_at):
+        params = request.query_params
+        today = timezone.localdate()
+        start = parse_date(params.get('start', '')) if params.get('start') else today - datetime.timedelta(days=self.default_days - 1)
+        end = parse_date(params.get('end', '')) if params.get('end') else today
+        group_by = params.get('group_by', 'day')
+        if start is None or end is None or start > end:
+            return Response({"error": "start and end must be dates (YYYY-MM-DD) with start <= end."}, status=status.HTTP_400_BAD_REQUEST)
+        if group_by not in self.groupings:
+            return Response({"error": f"group_by must be one of: {', '.join(self.groupings)}."}, status=status.HTTP_400_BAD_REQUEST)
+
+        rollups = DailyOrderRollup.objects.filter(day__gte=start, day__lte=end)
+        for name in ('category', 'seller'):
+            value = params.get(name)
+            if value:
+                if not value.isdigit():
+                    return Response({"error": f"{name} must be an id."}, status=status.HTTP_400_BAD_REQUEST)
+                rollups = rollups.filter(**{f'{name}_id': int(value)})
+
+        totals = {
+            'orders': Sum('orders'),
+            'completed_orders': Sum('completed_orders'),
+            'canceled_orders': Sum('canceled_orders'),
+            'paid_orders': Sum('paid_orders'),
+            'revenue': Sum('revenue'),
+        }
+        fields = self.groupings[group_by]
+        rows = rollups.order_by().values(*fields).annotate(**totals).order_by(fields[0])
+        return Response({
+            "start": start,
+            "end": end,
+            "group_by": group_by,
+            "refreshed_at": refreshed_at,
+            "totals": rollups.aggregate(**totals),
+            "results": list(rows),
+        })
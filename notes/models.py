@@ -12,3 +12,8 @@ class Note(models.Model):
 
     def __str__(self):
         return f"Note({self.user.username})"
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-created_at'], name='note_user_created_idx'),
+        ]
@@ -1,3 +1,4 @@
 from django.contrib import admin
-
+from notifications.models import NotificationArchive
 # Register your models here.
+admin.site.register(NotificationArchive)
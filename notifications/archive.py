@@ -0,0 +1,65 @@
+"""Retention for the notifications table.
+
+Notifications older than ``NOTIFICATION_RETENTION_DAYS`` are copied into
+``NotificationArchive`` and deleted from the live table, one batch per
+transaction. Batches walk the primary key from the oldest row, so each one is
+a short index range scan, and an interrupted run simply resumes with the
+oldest row still left; ``original_id`` is unique, so a batch is never
+archived twice.
+"""
+import datetime
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from . import unread
+from .models import Notification, NotificationArchive
+
+RETENTION_DAYS = getattr(settings, 'NOTIFICATION_RETENTION_DAYS', 90)
+BATCH_SIZE = 5000
+
+
+def retention_cutoff(days=None):
+    return timezone.now() - datetime.timedelta(days=RETENTION_DAYS if days is None else days)
+
+
+def archive_batch(cutoff, batch_size=BATCH_SIZE, read_only=False):
+    """Move one batch of notifications created before ``cutoff``; returns how many moved."""
+    expired = Notification.objects.filter(created_at__lt=cutoff)
+    if read_only:
+        expired = expired.filter(is_read=True)
+    with transaction.atomic():
+        rows = list(
+            expired.order_by('pk')
+            .select_for_update(skip_locked=True)
+            .values_list('pk', 'user_id', 'order_id', 'message', 'is_read', 'count', 'created_at')[:batch_size]
+        )
+        if not rows:
+            return 0
+        NotificationArchive.objects.bulk_create(
+            [
+                NotificationArchive(
+                    original_id=pk, user_id=user_id, order_id=order_id,
+                    message=message, is_read=is_read, count=count, created_at=created_at,
+                )
+                for pk, user_id, order_id, message, is_read, count, created_at in rows
+            ],
+            ignore_conflicts=True,
+        )
+        Notification.objects.filter(pk__in=[row[0] for row in rows]).delete()
+        unread.adjust(unread.unread_deltas([(row[1], row[4]) for row in rows], -1))
+    return len(rows)
+
+
+def archive_expired(days=None, batch_size=BATCH_SIZE, max_batches=None, read_only=False):
+    """Archive batches until nothing expired is left (or ``max_batches`` ran); returns the total."""
+    cutoff = retention_cutoff(days)
+    moved = batches = 0
+    while max_batches is None or batches < max_batches:
+        count = archive_batch(cutoff, batch_size, read_only)
+        if not count:
+            break
+        moved += count
+        batches += 1
+    return moved
@@ -0,0 +1,158 @@
+"""Publish/subscribe for pushing notifications to connected clients.
+
+``get_broker()`` returns the process-wide broker named by
+``NOTIFICATION_BROKER``. ``InProcessBroker`` hands messages to subscribers in
+the same process, which only covers a single worker and tests: notifications
+are written by whichever process handled the order, usually not the ASGI
+worker holding the client's stream. ``PostgresBroker`` carries them between
+processes with ``NOTIFY``/``LISTEN`` on the application database.
+"""
+import asyncio
+import json
+import logging
+import select
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import connection, connections
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+SUBSCRIPTION_QUEUE_SIZE = 100
+
+
+class Subscription:
+    """One connected client's queue; created and read on that client's event loop."""
+
+    def __init__(self, broker, user_id, maxsize=SUBSCRIPTION_QUEUE_SIZE):
+        self.broker = broker
+        self.user_id = user_id
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize)
+
+    def deliver(self, message):
+        # Called from whichever thread committed the notification.
+        try:
+            self.loop.call_soon_threadsafe(self._put, message)
+        except RuntimeError:
+            pass  # the client's loop is gone; its subscription is being torn down
+
+    def _put(self, message):
+        if self.queue.full():
+            # A client that stopped reading loses the oldest messages; it re-syncs with Last-Event-ID.
+            self.queue.get_nowait()
+        self.queue.put_nowait(message)
+
+    async def get(self):
+        return await self.queue.get()
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class InProcessBroker:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = defaultdict(set)
+
+    def subscribe(self, user_id):
+        subscription = Subscription(self, user_id)
+        with self._lock:
+            self._subscriptions[user_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.user_id)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.user_id]
+
+    def publish(self, user_id, message):
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(user_id, ()))
+        for subscription in subscriptions:
+            subscription.deliver(message)
+
+
+class PostgresBroker(InProcessBroker):
+    """Publish with ``pg_notify``; each process relays the channel to its own subscribers.
+
+    The listening connection is opened lazily by the first ``subscribe``, so
+    processes that only publish (WSGI workers, commands) never hold one. A
+    ``NOTIFY`` sent outside a transaction is delivered at once, and ``push``
+    publishes after commit, so listeners never see uncommitted rows. Payloads
+    over Postgres' 8000-byte limit are dropped with a warning; the client
+    picks them up on its next reconnect through ``Last-Event-ID``.
+    """
+    channel = 'notifications'
+    poll_seconds = 5
+    reconnect_seconds = 1
+
+    def __init__(self):
+        super().__init__()
+        self._listener = None
+
+    def subscribe(self, user_id):
+        with self._lock:
+            if self._listener is None or not self._listener.is_alive():
+                self._listener = threading.Thread(target=self.listen, name='notifications-listener', daemon=True)
+                self._listener.start()
+        return super().subscribe(user_id)
+
+    def publish(self, user_id, message):
+        payload = json.dumps({'user': user_id, 'message': message})
+        if len(payload.encode()) >= 8000:
+            logger.warning("Notification for user %s is too large to NOTIFY; it will be replayed on reconnect.", user_id)
+            return
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_notify(%s, %s)', [self.channel, payload])
+
+    def relay(self, payload):
+        try:
+            data = json.loads(payload)
+        except ValueError:
+            return
+        super().publish(data['user'], data['message'])
+
+    def listen(self):
+        while True:
+            listening = connections.create_connection('default')
+            try:
+                listening.ensure_connection()
+                listening.connection.autocommit = True
+                with listening.connection.cursor() as cursor:
+                    cursor.execute(f'LISTEN "{self.channel}"')
+                raw = listening.connection
+                while True:
+                    if select.select([raw], [], [], self.poll_seconds)[0]:
+                        raw.poll()
+                        while raw.notifies:
+                            self.relay(raw.notifies.pop(0).payload)
+            except Exception:
+                logger.exception("Notification listener lost its connection; reconnecting.")
+                time.sleep(self.reconnect_seconds)
+            finally:
+                listening.close()
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                _broker = import_string(settings.NOTIFICATION_BROKER)()
+    return _broker
+
+
+def set_broker(broker):
+    global _broker
+    _broker = broker
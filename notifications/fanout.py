@@ -0,0 +1,211 @@
+"""Single fan-out point for order notifications.
+
+Order events are turned into one notification per recipient and written
+with one ``bulk_create`` after the surrounding transaction commits, then
+pushed to connected clients through ``notifications.broker``. A recipient's
+unread notification about the same order that changed within
+``NOTIFICATION_COALESCE_WINDOW`` seconds absorbs the new one instead (latest
+message, ``count`` incremented, ``created_at`` moved to now so it sorts and
+replays as the newest activity). With ``NOTIFICATION_DIGEST`` on, events are
+staged in ``PendingNotification`` and delivered, merged per order, by the
+``send_notification_digests`` command. Saves that leave the status unchanged
+produce no event; updates made through ``orders.transitions`` arrive as
+``order_transitioned`` signals instead.
+"""
+import datetime
+from collections import namedtuple
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from services.models import Service
+from . import broker, unread
+from .models import Notification, PendingNotification
+
+OrderEvent = namedtuple('OrderEvent', ['order_id', 'buyer_id', 'seller_id', 'kind', 'status'])
+
+CREATED = 'created'
+STATUS_CHANGED = 'status_changed'
+PAID = 'paid'
+
+DIGEST_BATCH_SIZE = 1000
+
+
+def messages_for(event):
+    """Return ``[(user_id, message), ...]`` for one event."""
+    order = f"order (ID: {event.order_id})"
+    if event.kind == CREATED:
+        return [
+            (event.buyer_id, f"Your {order} has been placed."),
+            (event.seller_id, f"You received a new {order}."),
+        ]
+    if event.kind == PAID:
+        return [
+            (event.buyer_id, f"Payment received. Your {order} is now {event.status}."),
+            (event.seller_id, f"You received a paid {order}; it is now {event.status}."),
+        ]
+    return [
+        (event.buyer_id, f"Your {order} is now {event.status}."),
+        (event.seller_id, f"The {order} has been updated to {event.status}."),
+    ]
+
+
+def build_notifications(events):
+    notifications = []
+    for event in events:
+        for user_id, message in messages_for(event):
+            if user_id is not None:
+                notification = Notification(user_id=user_id, order_id=event.order_id, message=message)
+                # Carried along so the pushed copy matches NotificationSerializer without a lookup.
+                notification.order_status = event.status
+                notifications.append(notification)
+    return notifications
+
+
+def push_payload(notification):
+    return {
+        'id': notification.pk,
+        'user': notification.user_id,
+        'order': notification.order_id,
+        'message': notification.message,
+        'is_read': notification.is_read,
+        'count': notification.count,
+        'created_at': notification.created_at.isoformat(),
+        'updated_at': notification.updated_at.isoformat(),
+        'order_status': getattr(notification, 'order_status', None),
+    }
+
+
+def push(notifications):
+    pushed = broker.get_broker()
+    for notification in notifications:
+        pushed.publish(notification.user_id, push_payload(notification))
+
+
+def merge(notifications):
+    """Collapse notifications for the same (user, order) into the latest one, adding up counts."""
+    merged = {}
+    for notification in notifications:
+        key = (notification.user_id, notification.order_id)
+        if key in merged:
+            notification.count += merged[key].count
+        merged[key] = notification
+    return list(merged.values())
+
+
+def coalescing_targets(notifications, now):
+    """``{(user_id, order_id): (pk, count)}`` of unread rows updated within the window."""
+    window = settings.NOTIFICATION_COALESCE_WINDOW
+    if not window or not notifications:
+        return {}
+    rows = (
+        Notification.objects.filter(
+            user_id__in={notification.user_id for notification in notifications},
+            order_id__in={notification.order_id for notification in notifications},
+            is_read=False,
+            updated_at__gte=now - datetime.timedelta(seconds=window),
+        )
+        .order_by('pk')
+        .values_list('pk', 'user_id', 'order_id', 'count')
+    )
+    return {(user_id, order_id): (pk, count) for pk, user_id, order_id, count in rows}
+
+
+def write_notifications(notifications):
+    """Store notifications, folding each into the recipient's recent unread row for the same order.
+
+    New rows go in with one ``bulk_create``; a coalesced row takes the latest
+    message, adds to its ``count`` and moves ``created_at`` to now, so the list
+    (newest first) and the stream's replay see it as new. Both are pushed once
+    committed.
+    """
+    notifications = merge(notifications)
+    now = timezone.now()
+    fresh, coalesced = [], []
+    with transaction.atomic():
+        targets = coalescing_targets(notifications, now)
+        for notification in notifications:
+            target = targets.get((notification.user_id, notification.order_id))
+            updated = target is not None and Notification.objects.filter(pk=target[0], is_read=False).update(
+                message=notification.message, count=F('count') + notification.count, created_at=now, updated_at=now,
+            )
+            if not updated:
+                fresh.append(notification)
+                continue
+            notification.pk, previous_count = target
+            notification.count += previous_count
+            notification.created_at = notification.updated_at = now
+            coalesced.append(notification)
+
+        if fresh:
+            Notification.objects.bulk_create(fresh)
+            unread.adjust(unread.unread_deltas(fresh, +1))
+        written = fresh + coalesced
+        if written:
+            transaction.on_commit(lambda: push(written))
+    return written
+
+
+def stage_for_digest(notifications):
+    PendingNotification.objects.bulk_create([
+        PendingNotification(
+            user_id=notification.user_id,
+            order_id=notification.order_id,
+            message=notification.message,
+            order_status=notification.order_status,
+        )
+        for notification in notifications
+    ])
+
+
+def flush_digest(batch_size=DIGEST_BATCH_SIZE):
+    """Deliver one batch of staged notifications, merged per (user, order); returns how many were staged."""
+    with transaction.atomic():
+        pending = list(PendingNotification.objects.select_for_update(skip_locked=True).order_by('pk')[:batch_size])
+        if not pending:
+            return 0
+        notifications = []
+        for staged in pending:
+            notification = Notification(user_id=staged.user_id, order_id=staged.order_id, message=staged.message)
+            notification.order_status = staged.order_status
+            notifications.append(notification)
+        PendingNotification.objects.filter(pk__in=[staged.pk for staged in pending]).delete()
+        write_notifications(notifications)
+    return len(pending)
+
+
+def publish(events):
+    """Write notifications for ``events`` after commit, or stage them for the digest in digest mode."""
+    notifications = build_notifications(events)
+    if not notifications:
+        return
+    if settings.NOTIFICATION_DIGEST:
+        stage_for_digest(notifications)
+    else:
+        transaction.on_commit(lambda: write_notifications(notifications))
+
+
+def seller_id_for(order):
+    if type(order).service.is_cached(order):
+        return order.service.seller_id
+    return Service.objects.filter(pk=order.service_id).values_list('seller_id', flat=True).first()
+
+
+def event_for_save(order, created):
+    """Describe a saved order as an event, or ``None`` if nothing notifiable changed."""
+    if created:
+        kind = CREATED
+    else:
+        previous_status, previous_paid = order.loaded_state
+        became_paid = order.is_paid and not previous_paid
+        if order.status == previous_status and not became_paid:
+            return None
+        kind = PAID if became_paid else STATUS_CHANGED
+    return OrderEvent(order.pk, order.buyer_id, seller_id_for(order), kind, order.status)
+
+
+def event_for_transition(transition):
+    kind = PAID if transition.paid else STATUS_CHANGED
+    return OrderEvent(transition.order_id, transition.buyer_id, transition.seller_id, kind, transition.to_status)
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from notifications import archive
+
+
+class Command(BaseCommand):
+    help = "Move notifications older than the retention period into the archive table, in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=archive.RETENTION_DAYS, help="Retention period in days.")
+        parser.add_argument('--batch-size', type=int, default=archive.BATCH_SIZE)
+        parser.add_argument('--max-batches', type=int, default=None, help="Stop after this many batches; rerun to resume.")
+        parser.add_argument('--read-only', action='store_true', help="Only archive notifications that have been read.")
+
+    def handle(self, *args, **options):
+        moved = archive.archive_expired(
+            days=options['days'],
+            batch_size=options['batch_size'],
+            max_batches=options['max_batches'],
+            read_only=options['read_only'],
+        )
+        self.stdout.write(self.style.SUCCESS(f"Archived {moved} notifications."))
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+from notifications import archive, partitioning
+
+
+class Command(BaseCommand):
+    help = "Manage monthly partitions of the notifications table (PostgreSQL only)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--convert', action='store_true', help="Turn the existing table into a partitioned one (locks it while rows are copied).")
+        parser.add_argument('--months-ahead', type=int, default=3, help="Create partitions this many months past the current one.")
+        parser.add_argument('--drop-empty', action='store_true', help="Drop emptied partitions older than the retention period.")
+
+    def handle(self, *args, **options):
+        try:
+            if options['convert']:
+                partitions = partitioning.convert(options['months_ahead'])
+                self.stdout.write(f"Converted notifications table; {len(partitions)} monthly partitions.")
+            elif not partitioning.is_partitioned():
+                raise CommandError("The notifications table is not partitioned; run with --convert first.")
+            else:
+                partitions = partitioning.ensure_partitions(options['months_ahead'])
+                self.stdout.write(f"Ensured {len(partitions)} monthly partitions.")
+
+            if options['drop_empty']:
+                dropped = partitioning.drop_empty_partitions(archive.retention_cutoff().date())
+                self.stdout.write(f"Dropped {len(dropped)} empty partitions.")
+        except partitioning.PartitioningError as e:
+            raise CommandError(str(e))
+        self.stdout.write(self.style.SUCCESS("Done."))
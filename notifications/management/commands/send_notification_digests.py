@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from notifications import fanout
+
+
+class Command(BaseCommand):
+    help = "Deliver notifications staged in digest mode, merged per user and order. Run it periodically."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=fanout.DIGEST_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        delivered = 0
+        while True:
+            count = fanout.flush_digest(options['batch_size'])
+            if not count:
+                break
+            delivered += count
+        self.stdout.write(self.style.SUCCESS(f"Delivered {delivered} staged notifications."))
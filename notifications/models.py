@@ -9,10 +9,57 @@ class Notification(models.Model):
     order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='notifications')
     message = models.CharField(max_length=255)
     is_read = models.BooleanField(default=False)
+    # How many updates were coalesced into this row; ``message`` is the latest one.
+    count = models.PositiveIntegerField(default=1)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"Notification for {self.user} regarding Order {self.order.id}"
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', '-created_at'], name='notification_user_created_idx'),
+            models.Index(fields=['user'], condition=models.Q(is_read=False), name='notification_unread_idx'),
+        ]
+
+
+class NotificationArchive(models.Model):
+    """Notifications moved out of the live table by ``archive_notifications``.
+
+    ``order_id`` is kept as a plain column so archived history does not pin
+    or cascade with the orders table.
+    """
+    original_id = models.BigIntegerField(unique=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    order_id = models.BigIntegerField()
+    message = models.CharField(max_length=255)
+    is_read = models.BooleanField(default=False)
+    count = models.PositiveIntegerField(default=1)
+    created_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Archived notification {self.original_id} for user {self.user_id}"
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', '-created_at'], name='notification_archive_user_idx'),
+        ]
+
+
+class PendingNotification(models.Model):
+    """Notification staged for the next digest (``NOTIFICATION_DIGEST``), flushed by ``send_notification_digests``."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='+')
+    message = models.CharField(max_length=255)
+    order_status = models.CharField(max_length=20)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Pending notification for user {self.user_id} regarding Order {self.order_id}"
+
+    class Meta:
+        ordering = ['pk']
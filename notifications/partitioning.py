@@ -0,0 +1,178 @@
+"""Optional monthly range partitioning of the notifications table (PostgreSQL only).
+
+``convert`` swaps ``notifications_notification`` for a table partitioned by
+``created_at`` with the same columns, foreign keys and indexes, copies the
+rows over and drops the old table. ``ensure_partitions`` then keeps monthly
+partitions created ahead of time, and ``drop_empty_partitions`` removes
+months that ``archive_notifications`` has emptied, so recent-notification
+queries only touch the newest partitions.
+
+Orders are not partitioned: a partitioned table's primary key has to include
+the partition key, and notifications, reviews and other tables hold foreign
+keys to ``orders_order.id`` alone.
+"""
+import datetime
+import re
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import Notification
+
+TABLE = Notification._meta.db_table
+LEGACY_TABLE = f'{TABLE}_unpartitioned'
+SEQUENCE = f'{TABLE}_partitioned_id_seq'
+DEFAULT_PARTITION = f'{TABLE}_default'
+PARTITION_NAME_RE = re.compile(re.escape(TABLE) + r'_y(?P<year>\d{4})m(?P<month>\d{2})')
+
+
+class PartitioningError(Exception):
+    pass
+
+
+def require_postgres():
+    if connection.vendor != 'postgresql':
+        raise PartitioningError("Notification partitioning needs PostgreSQL.")
+
+
+def is_partitioned():
+    require_postgres()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table WHERE partrelid = %s::regclass", [TABLE]
+        )
+        return cursor.fetchone() is not None
+
+
+def month_start(value):
+    return datetime.date(value.year, value.month, 1)
+
+
+def next_month(day):
+    return datetime.date(day.year + day.month // 12, day.month % 12 + 1, 1)
+
+
+def partition_name(month):
+    return f'{TABLE}_y{month.year}m{month.month:02d}'
+
+
+def create_partition(cursor, month):
+    name = partition_name(month)
+    cursor.execute(
+        f'CREATE TABLE IF NOT EXISTS "{name}" PARTITION OF "{TABLE}" '
+        f"FOR VALUES FROM ('{month.isoformat()}') TO ('{next_month(month).isoformat()}')"
+    )
+    return name
+
+
+def partition_months(months_ahead, start=None, through=None, today=None):
+    """Months from ``start`` (default: this month) through ``months_ahead`` months past this month.
+
+    ``through`` extends the range to a later month, e.g. one holding future-dated rows.
+    """
+    this_month = month_start(today or timezone.localdate())
+    month = min(month_start(start), this_month) if start else this_month
+    last = this_month
+    for _ in range(months_ahead):
+        last = next_month(last)
+    if through is not None:
+        last = max(last, month_start(through))
+    months = []
+    while month <= last:
+        months.append(month)
+        month = next_month(month)
+    return months
+
+
+def ensure_partitions(months_ahead=3, start=None, through=None):
+    """Create monthly partitions from ``start`` (default: this month) through ``months_ahead`` months past this month.
+
+    Every month up to today has to get its partition here: once the default
+    partition holds rows for a month, PostgreSQL refuses to create it.
+    """
+    require_postgres()
+    with connection.cursor() as cursor:
+        return [create_partition(cursor, month) for month in partition_months(months_ahead, start, through)]
+
+
+def foreign_key_definitions(cursor, table):
+    cursor.execute(
+        "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+        "WHERE conrelid = %s::regclass AND contype = 'f'",
+        [table],
+    )
+    return cursor.fetchall()
+
+
+@transaction.atomic
+def convert(months_ahead=3):
+    """Rebuild the notifications table as a partitioned table; returns the partitions created."""
+    require_postgres()
+    if is_partitioned():
+        raise PartitioningError(f"{TABLE} is already partitioned.")
+
+    with connection.cursor() as cursor:
+        cursor.execute(f'LOCK TABLE "{TABLE}" IN ACCESS EXCLUSIVE MODE')
+        foreign_keys = foreign_key_definitions(cursor, TABLE)
+        cursor.execute(f'SELECT MIN(created_at), MAX(created_at), MAX(id) FROM "{TABLE}"')
+        oldest, newest, max_id = cursor.fetchone()
+
+        cursor.execute(f'ALTER TABLE "{TABLE}" RENAME TO "{LEGACY_TABLE}"')
+        for name, _ in foreign_keys:
+            cursor.execute(f'ALTER TABLE "{LEGACY_TABLE}" DROP CONSTRAINT "{name}"')
+        cursor.execute(
+            f'CREATE TABLE "{TABLE}" (LIKE "{LEGACY_TABLE}" INCLUDING DEFAULTS) PARTITION BY RANGE (created_at)'
+        )
+        cursor.execute(f'ALTER TABLE "{TABLE}" ADD CONSTRAINT "{TABLE}_partitioned_pkey" PRIMARY KEY (id, created_at)')
+        cursor.execute(f'CREATE SEQUENCE "{SEQUENCE}"')
+        cursor.execute(f"SELECT setval('\"{SEQUENCE}\"', %s)", [(max_id or 0) + 1])
+        cursor.execute(f'ALTER TABLE "{TABLE}" ALTER COLUMN id SET DEFAULT nextval(\'"{SEQUENCE}"\')')
+        for name, definition in foreign_keys:
+            cursor.execute(f'ALTER TABLE "{TABLE}" ADD CONSTRAINT "{name}" {definition}')
+
+        cursor.execute(f'CREATE TABLE "{DEFAULT_PARTITION}" PARTITION OF "{TABLE}" DEFAULT')
+
+    # Partition bounds are read in the connection's time zone, which Django sets to UTC.
+    first = oldest.astimezone(datetime.timezone.utc).date() if oldest else None
+    last = newest.astimezone(datetime.timezone.utc).date() if newest else None
+    partitions = ensure_partitions(months_ahead, start=first, through=last)
+
+    with connection.cursor() as cursor:
+        cursor.execute(f'INSERT INTO "{TABLE}" SELECT * FROM "{LEGACY_TABLE}"')
+        cursor.execute(f'DROP TABLE "{LEGACY_TABLE}"')
+        cursor.execute(f'ALTER SEQUENCE "{SEQUENCE}" OWNED BY "{TABLE}".id')
+
+    # Indexes are built once the rows are in, and after the old table (and its index names) is gone.
+    with connection.schema_editor(atomic=False) as editor:
+        for field_name in ('user', 'order'):
+            column = Notification._meta.get_field(field_name).column
+            editor.execute(f'CREATE INDEX "{TABLE}_{column}_idx" ON "{TABLE}" ("{column}")')
+        for index in Notification._meta.indexes:
+            editor.add_index(Notification, index)
+    return partitions
+
+
+def drop_empty_partitions(before):
+    """Drop monthly partitions that end on or before ``before`` and hold no rows."""
+    require_postgres()
+    dropped = []
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE pg_inherits.inhparent = %s::regclass ORDER BY child.relname",
+            [TABLE],
+        )
+        for (name,) in cursor.fetchall():
+            match = PARTITION_NAME_RE.fullmatch(name)
+            if match is None:
+                continue
+            month = datetime.date(int(match['year']), int(match['month']), 1)
+            if next_month(month) > before:
+                continue
+            cursor.execute(f'SELECT EXISTS (SELECT 1 FROM "{name}")')
+            if cursor.fetchone()[0]:
+                continue
+            cursor.execute(f'DROP TABLE "{name}"')
+            dropped.append(name)
+    return dropped
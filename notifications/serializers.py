@@ -6,4 +6,12 @@ class NotificationSerializer(serializers.ModelSerializer):
     order_status = serializers.CharField(source="order.status", read_only=True)
     class Meta:
         model = Notification
-        fields = ['id', 'user', 'order', 'message', 'is_read', 'created_at', 'order_status']
\ No newline at end of file
+        fields = ['id', 'user', 'order', 'message', 'is_read', 'count', 'created_at', 'updated_at', 'order_status']
+        read_only_fields = ['count', 'updated_at']
+
+
+MARK_READ_MAX_IDS = 500
+
+
+class MarkReadSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.IntegerField(), allow_empty=False, max_length=MARK_READ_MAX_IDS)
@@ -1,20 +1,16 @@
 from django.db.models.signals import post_save
 from django.dispatch import receiver
-from .models import Notification
 from orders.models import Order
+from orders.transitions import order_transitioned
+from . import fanout
 
 @receiver(post_save, sender=Order)
-def create_order_notification(sender, instance, **kwargs):
- 
-    Notification.objects.create(
-        user=instance.service.seller,
-        order=instance,
-        message=f"Your order (ID: {instance.id}) has been updated to {instance.status}."
-    )
-    
+def fan_out_order_notifications(sender, instance, created, **kwargs):
+    event = fanout.event_for_save(instance, created)
+    if event is not None:
+        fanout.publish([event])
 
-    Notification.objects.create(
-        user=instance.buyer,
-        order=instance,
-        message=f"Your order (ID: {instance.id}) is now {instance.status}."
-    )
+
+@receiver(order_transitioned)
+def fan_out_order_transitions(sender, transitions, **kwargs):
+    fanout.publish([fanout.event_for_transition(transition) for transition in transitions])
@@ -0,0 +1,174 @@
+"""Server-Sent Events endpoint that pushes new notifications as they are written.
+
+Mounted in ``skillbridge.asgi`` ahead of Django, because a response that stays
+open for minutes does not fit the request/response cycle. It is only served
+when the app runs under an ASGI server with a cross-process broker (see
+``notifications.broker`` and the README); a WSGI deployment answers the path
+with ``503`` from ``NotificationViewSet.stream``.
+
+EventSource cannot send an Authorization header, so browsers first
+``POST /api/v1/notifications/stream-token/`` and connect with
+``new EventSource('/api/v1/notifications/stream/?token=<stream token>')``.
+A stream token is only good for opening the stream, and only for
+``NOTIFICATION_STREAM_TOKEN_LIFETIME``; when the connection fails the client
+fetches a new one. Access tokens are never accepted in the query string, where
+they would end up in logs; other clients send ``Authorization: JWT ...``.
+Every event id is the notification's
+``created_at`` and id, so a reconnecting client sends ``Last-Event-ID`` and
+is first sent whatever was created, or coalesced into an existing row
+(which moves its ``created_at``), since then.
+"""
+import asyncio
+import datetime
+import json
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.tokens import AccessToken, Token
+
+from . import broker
+from .fanout import push_payload
+from .models import Notification
+
+STREAM_PATH = '/api/v1/notifications/stream/'
+HEARTBEAT_SECONDS = getattr(settings, 'NOTIFICATION_STREAM_HEARTBEAT', 15)
+RETRY_MILLISECONDS = 5000
+REPLAY_LIMIT = 100
+
+
+def header(scope, name):
+    for key, value in scope.get('headers', ()):
+        if key.decode('latin1').lower() == name:
+            return value.decode('latin1')
+    return None
+
+
+class StreamToken(Token):
+    """Signed like an access token, but only opens the notification stream."""
+    token_type = 'stream'
+    lifetime = datetime.timedelta(seconds=getattr(settings, 'NOTIFICATION_STREAM_TOKEN_LIFETIME', 60))
+
+
+def presented_token(scope):
+    """``(token class, raw token)`` from ``?token=`` or the Authorization header, or ``None``."""
+    token = parse_qs(scope.get('query_string', b'').decode()).get('token', [None])[0]
+    if token:
+        return StreamToken, token
+    authorization = (header(scope, 'authorization') or '').split()
+    if len(authorization) == 2 and authorization[0] in jwt_settings.AUTH_HEADER_TYPES:
+        return AccessToken, authorization[1]
+    return None
+
+
+@sync_to_async
+def authenticate(scope):
+    """Return the id of the active user the token belongs to, or ``None``."""
+    presented = presented_token(scope)
+    if presented is None:
+        return None
+    token_class, token = presented
+    try:
+        user_id = token_class(token)[jwt_settings.USER_ID_CLAIM]
+    except (TokenError, KeyError):
+        return None
+    lookup = {jwt_settings.USER_ID_FIELD: user_id, 'is_active': True}
+    return get_user_model().objects.filter(**lookup).values_list('pk', flat=True).first()
+
+
+def event_id(payload):
+    return f"{payload['created_at']}/{payload['id']}"
+
+
+def parse_event_id(value):
+    """``(created_at, pk)`` from an ``event_id``, or ``None`` if ``value`` is not one.
+
+    A bare id, sent by clients connected before ids carried ``created_at``,
+    gives ``(None, pk)``.
+    """
+    if value and value.isdigit():
+        return None, int(value)
+    created_at, _, pk = (value or '').rpartition('/')
+    created_at = parse_datetime(created_at) if created_at else None
+    if created_at is None or not pk.isdigit():
+        return None
+    return created_at, int(pk)
+
+
+@sync_to_async
+def missed_since(user_id, last_seen):
+    created_at, pk = last_seen
+    if created_at is None:
+        missed = Q(pk__gt=pk)
+    else:
+        missed = Q(created_at__gt=created_at) | Q(created_at=created_at, pk__gt=pk)
+    notifications = (
+        Notification.objects.filter(missed, user_id=user_id)
+        .select_related('order')
+        .order_by('created_at', 'pk')[:REPLAY_LIMIT]
+    )
+    payloads = []
+    for notification in notifications:
+        notification.order_status = notification.order.status
+        payloads.append(push_payload(notification))
+    return payloads
+
+
+def event(payload):
+    return f"id: {event_id(payload)}\nevent: notification\ndata: {json.dumps(payload)}\n\n".encode()
+
+
+def response_headers(scope):
+    headers = [
+        (b'content-type', b'text/event-stream'),
+        (b'cache-control', b'no-cache'),
+        (b'x-accel-buffering', b'no'),
+    ]
+    origin = header(scope, 'origin')
+    if origin and origin in getattr(settings, 'CORS_ALLOWED_ORIGINS', ()):
+        headers += [(b'access-control-allow-origin', origin.encode()), (b'vary', b'Origin')]
+    return headers
+
+
+async def wait_for_disconnect(receive):
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+
+async def notification_stream(scope, receive, send):
+    user_id = await authenticate(scope)
+    if user_id is None:
+        body = json.dumps({"detail": "Authentication credentials were not provided or are invalid."}).encode()
+        await send({'type': 'http.response.start', 'status': 401, 'headers': [(b'content-type', b'application/json')]})
+        await send({'type': 'http.response.body', 'body': body})
+        return
+
+    subscription = broker.get_broker().subscribe(user_id)
+    disconnected = asyncio.ensure_future(wait_for_disconnect(receive))
+    try:
+        await send({'type': 'http.response.start', 'status': 200, 'headers': response_headers(scope)})
+        await send({'type': 'http.response.body', 'body': f'retry: {RETRY_MILLISECONDS}\n\n'.encode(), 'more_body': True})
+
+        last_seen = parse_event_id(header(scope, 'last-event-id'))
+        if last_seen is not None:
+            for payload in await missed_since(user_id, last_seen):
+                await send({'type': 'http.response.body', 'body': event(payload), 'more_body': True})
+
+        while not disconnected.done():
+            message = asyncio.ensure_future(subscription.get())
+            done, _ = await asyncio.wait({message, disconnected}, timeout=HEARTBEAT_SECONDS, return_when=asyncio.FIRST_COMPLETED)
+            if message in done:
+                body = event(message.result())
+            else:
+                message.cancel()
+                body = b': keepalive\n\n'
+            if not disconnected.done():
+                await send({'type': 'http.response.body', 'body': body, 'more_body': True})
+    finally:
+        subscription.close()
+        disconnected.cancel()
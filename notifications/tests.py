@@ -1,3 +1,194 @@
-from django.test import TestCase
+import asyncio
+import datetime
+from unittest import skipUnless
 
-# Create your tests here.
+from asgiref.sync import async_to_sync, sync_to_async
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api.testing import as_worker, make_service, make_user, seconds_later
+from orders.models import Order
+from . import broker, fanout, partitioning
+from .models import Notification
+from .stream import STREAM_PATH, event_id, missed_since, notification_stream, parse_event_id
+
+
+class UnreadTests(TestCase):
+    def setUp(self):
+        seller = make_user('seller', 'seller')
+        self.user = make_user('buyer')
+        service = make_service(seller)
+        self.order = Order.objects.create(buyer=self.user, service=service)
+        Notification.objects.filter(user=self.user).delete()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def unread(self):
+        return self.client.get('/api/v1/notifications/unread-count/').data['unread']
+
+    def test_mark_read_rejects_bodies_that_are_not_objects(self):
+        response = self.client.post('/api/v1/notifications/mark-read/', [1], format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_mark_read_rejects_invalid_ids(self):
+        response = self.client.post('/api/v1/notifications/mark-read/', {'ids': ['x']}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    @override_settings(LOCAL_CACHE_TIMEOUT=5)
+    def test_write_in_another_worker_is_seen_after_the_local_timeout(self):
+        notification = Notification.objects.create(user=self.user, order=self.order, message='Order placed')
+        with as_worker('a'):
+            self.assertEqual(self.unread(), 1)
+        with as_worker('b'), self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/v1/notifications/mark-read/', {'ids': [notification.pk]}, format='json')
+            self.assertEqual(response.data['updated'], 1)
+        with as_worker('a'):
+            with seconds_later(6):
+                self.assertEqual(self.unread(), 0)
+
+
+class CoalescingTests(TestCase):
+    def setUp(self):
+        self.seller = make_user('seller', 'seller')
+        self.buyer = make_user('buyer')
+        service = make_service(self.seller)
+        self.first = Order.objects.create(buyer=self.buyer, service=service)
+        self.second = Order.objects.create(buyer=self.buyer, service=service)
+
+    def notify(self, order, status):
+        event = fanout.OrderEvent(order.pk, self.buyer.pk, None, fanout.STATUS_CHANGED, status)
+        return fanout.write_notifications(fanout.build_notifications([event]))
+
+    @override_settings(NOTIFICATION_COALESCE_WINDOW=600)
+    def test_coalesced_row_sorts_and_replays_as_newest(self):
+        self.notify(self.first, Order.PENDING)
+        [latest_other] = self.notify(self.second, Order.PENDING)
+        [coalesced] = self.notify(self.first, Order.COMPLETED)
+        self.assertEqual(coalesced.count, 2)
+
+        client = APIClient()
+        client.force_authenticate(self.buyer)
+        results = client.get('/api/v1/notifications/').data
+        results = results['results'] if isinstance(results, dict) else results
+        self.assertEqual(results[0]['id'], coalesced.pk)
+
+        last_seen = parse_event_id(event_id(fanout.push_payload(latest_other)))
+        replayed = async_to_sync(missed_since)(self.buyer.pk, last_seen)
+        self.assertEqual([(payload['id'], payload['count']) for payload in replayed], [(coalesced.pk, 2)])
+
+    @override_settings(NOTIFICATION_COALESCE_WINDOW=0)
+    def test_window_is_read_when_writing(self):
+        self.notify(self.first, Order.PENDING)
+        self.notify(self.first, Order.COMPLETED)
+        self.assertEqual(Notification.objects.filter(user=self.buyer, order=self.first).count(), 2)
+
+    @override_settings(NOTIFICATION_DIGEST=True)
+    def test_digest_mode_is_read_when_publishing(self):
+        event = fanout.OrderEvent(self.first.pk, self.buyer.pk, None, fanout.STATUS_CHANGED, Order.COMPLETED)
+        with self.captureOnCommitCallbacks(execute=True):
+            fanout.publish([event])
+        self.assertFalse(Notification.objects.filter(user=self.buyer).exists())
+        self.assertEqual(fanout.flush_digest(), 1)
+        self.assertTrue(Notification.objects.filter(user=self.buyer).exists())
+
+
+class PartitionRangeTests(SimpleTestCase):
+    def test_old_data_gets_every_month_through_the_current_one(self):
+        months = partitioning.partition_months(
+            2, start=datetime.date(2025, 11, 20), today=datetime.date(2026, 3, 5)
+        )
+        self.assertEqual(months[0], datetime.date(2025, 11, 1))
+        self.assertEqual(months[-1], datetime.date(2026, 5, 1))
+        self.assertEqual(len(months), 7)
+
+    def test_future_rows_extend_the_range(self):
+        months = partitioning.partition_months(
+            0, through=datetime.date(2026, 6, 2), today=datetime.date(2026, 3, 5)
+        )
+        self.assertEqual(months, [datetime.date(2026, month, 1) for month in (3, 4, 5, 6)])
+
+
+@skipUnless(connection.vendor == 'postgresql', "Notification partitioning needs PostgreSQL.")
+class PartitionConversionTests(TransactionTestCase):
+    def test_convert_with_rows_older_than_months_ahead(self):
+        seller = make_user('seller', 'seller')
+        buyer = make_user('buyer')
+        service = make_service(seller)
+        order = Order.objects.create(buyer=buyer, service=service)
+        old = Notification.objects.create(user=buyer, order=order, message='Old')
+        Notification.objects.filter(pk=old.pk).update(created_at=timezone.now() - datetime.timedelta(days=200))
+
+        partitioning.convert(months_ahead=1)
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT COUNT(*) FROM "{partitioning.DEFAULT_PARTITION}"')
+            self.assertEqual(cursor.fetchone()[0], 0)
+        # The next maintenance run must not collide with rows in the default partition.
+        partitioning.ensure_partitions(1)
+
+
+class StreamTests(TransactionTestCase):
+    """Drive the ASGI stream the way a server would, with orders written by "another request"."""
+    broker_class = broker.InProcessBroker
+
+    def setUp(self):
+        broker.set_broker(self.broker_class())
+        self.addCleanup(broker.set_broker, None)
+        self.buyer = make_user('buyer')
+        self.service = make_service(make_user('seller', 'seller'))
+
+    def stream_token(self):
+        client = APIClient()
+        client.force_authenticate(self.buyer)
+        response = client.post('/api/v1/notifications/stream-token/')
+        self.assertEqual(response.status_code, 200)
+        return response.data['token']
+
+    @async_to_sync
+    async def open_stream(self, query_string, while_open=None):
+        """Run the stream until a notification arrives (or it ends); returns the status and events sent."""
+        scope = {'type': 'http', 'path': STREAM_PATH, 'query_string': query_string.encode(), 'headers': []}
+        incoming = asyncio.Queue()
+        sent = {'status': None, 'events': []}
+        opened, notified = asyncio.Event(), asyncio.Event()
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                sent['status'] = message['status']
+            body = message.get('body', b'')
+            if body.startswith(b'retry:'):
+                opened.set()
+            elif body.startswith(b'id:'):
+                sent['events'].append(body)
+                notified.set()
+
+        stream = asyncio.ensure_future(notification_stream(scope, incoming.get, send))
+        if while_open is not None:
+            await asyncio.wait_for(opened.wait(), 5)
+            await sync_to_async(while_open)()
+            await asyncio.wait_for(notified.wait(), 5)
+            await incoming.put({'type': 'http.disconnect'})
+        await asyncio.wait_for(stream, 5)
+        return sent
+
+    def test_delivers_notifications_committed_after_connecting(self):
+        sent = self.open_stream(
+            f'token={self.stream_token()}',
+            while_open=lambda: Order.objects.create(buyer=self.buyer, service=self.service),
+        )
+        self.assertEqual(sent['status'], 200)
+        self.assertEqual(len(sent['events']), 1)
+        self.assertIn(b'has been placed', sent['events'][0])
+
+    def test_access_tokens_cannot_open_the_stream(self):
+        self.assertEqual(self.open_stream(f'token={AccessToken.for_user(self.buyer)}')['status'], 401)
+
+    def test_wsgi_deployments_report_the_stream_unavailable(self):
+        self.assertEqual(APIClient().get(STREAM_PATH).status_code, 503)
+
+
+@skipUnless(connection.vendor == 'postgresql', "LISTEN/NOTIFY needs PostgreSQL.")
+class PostgresStreamTests(StreamTests):
+    broker_class = broker.PostgresBroker
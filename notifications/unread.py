@@ -0,0 +1,65 @@
+"""Per-user unread notification counters for the bell badge.
+
+A counter is filled from one ``COUNT`` over the partial unread index on a
+miss, then moved by the writers (fan-out inserts, mark-read updates,
+deletes and archiving) after their transaction commits. Writers only adjust
+counters that are already cached, and entries expire after
+``NOTIFICATION_UNREAD_TIMEOUT`` so a miss racing a concurrent write cannot
+stay wrong for long.
+
+Adjustments only reach other workers through a shared cache backend; with
+the per-process local-memory cache counters expire after
+``LOCAL_CACHE_TIMEOUT`` instead (see ``api.caching``).
+"""
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from api.caching import coherent_timeout
+from .models import Notification
+
+
+def unread_cache_key(user_id):
+    return f'notifications:unread:{user_id}'
+
+
+def unread_count(user_id):
+    key = unread_cache_key(user_id)
+    count = cache.get(key)
+    if count is None:
+        count = Notification.objects.filter(user_id=user_id, is_read=False).count()
+        cache.add(key, count, coherent_timeout(settings.NOTIFICATION_UNREAD_TIMEOUT))
+    return count
+
+
+def apply_deltas(deltas):
+    for user_id, delta in deltas.items():
+        if not delta:
+            continue
+        key = unread_cache_key(user_id)
+        try:
+            if cache.incr(key, delta) < 0:
+                cache.delete(key)
+        except ValueError:
+            pass  # not cached; the next read counts it
+
+
+def adjust(deltas):
+    """Apply ``{user_id: delta}`` to cached counters once the current transaction commits."""
+    deltas = {user_id: delta for user_id, delta in deltas.items() if delta}
+    if deltas:
+        transaction.on_commit(lambda: apply_deltas(deltas))
+
+
+def unread_deltas(notifications, sign):
+    """``{user_id: sign * unread}`` for ``notifications`` (instances or ``(user_id, is_read)`` pairs)."""
+    counts = Counter()
+    for notification in notifications:
+        user_id, is_read = (
+            notification if isinstance(notification, tuple) else (notification.user_id, notification.is_read)
+        )
+        if not is_read:
+            counts[user_id] += sign
+    return counts
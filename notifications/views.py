@@ -1,13 +1,19 @@
-from rest_framework import viewsets
-from rest_framework.permissions import IsAuthenticated
+from django.db.models import Count, Max, Q
+from rest_framework import status, viewsets
+from rest_framework.decorators import action
+from rest_framework.permissions import AllowAny, IsAuthenticated
 from .models import Notification
-from .serializers import NotificationSerializer
+from .serializers import NotificationSerializer, MarkReadSerializer
 from rest_framework.exceptions import PermissionDenied
 from orders.models import Order
 from rest_framework.response import Response
+from users.authentication import CLAIM_AUTHENTICATION_CLASSES
+from api.conditional import ConditionalGetMixin, Stamp
+from . import unread
+from .stream import StreamToken
 
 
-class NotificationViewSet(viewsets.ModelViewSet):
+class NotificationViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     serializer_class = NotificationSerializer
     permission_classes = [IsAuthenticated]
 
@@ -23,8 +29,67 @@ class NotificationViewSet(viewsets.ModelViewSet):
     
         return Notification.objects.filter(user=self.request.user).select_related('user')
 
+    def get_list_stamp(self, request):
+        # Rows are added, deleted, marked read or coalesced (which moves updated_at), and every
+        # order status change touches one, so these numbers move whenever the serialized list would.
+        if request.user.is_anonymous:
+            return None
+        stamp = Notification.objects.filter(user=request.user).aggregate(
+            total=Count('pk'), newest=Max('pk'), unread=Count('pk', filter=Q(is_read=False)),
+            updated=Max('updated_at'),
+        )
+        return Stamp(stamp['total'], stamp['newest'], stamp['unread'], stamp['updated'], per_user=True)
+
+    def get_detail_stamp(self, request):
+        return self.get_list_stamp(request)
+
     def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
+        notification = serializer.save(user=self.request.user)
+        unread.adjust(unread.unread_deltas([notification], +1))
 
     def perform_update(self, serializer):
-        serializer.save(is_read=True)
+        was_unread = not serializer.instance.is_read
+        notification = serializer.save(is_read=True)
+        if was_unread:
+            unread.adjust({notification.user_id: -1})
+
+    def perform_destroy(self, instance):
+        instance.delete()
+        unread.adjust(unread.unread_deltas([instance], -1))
+
+    @action(detail=False, methods=['get'], url_path='unread-count', authentication_classes=CLAIM_AUTHENTICATION_CLASSES)
+    def unread_count(self, request):
+        return Response({"unread": unread.unread_count(request.user.pk)})
+
+    @action(detail=False, methods=['post'], url_path='mark-all-read')
+    def mark_all_read(self, request):
+        updated = Notification.objects.filter(user=request.user, is_read=False).update(is_read=True)
+        unread.adjust({request.user.pk: -updated})
+        return Response({"updated": updated})
+
+    @action(detail=False, methods=['post'], url_path='mark-read')
+    def mark_read(self, request):
+        serializer = MarkReadSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        ids = serializer.validated_data['ids']
+
+        updated = Notification.objects.filter(user=request.user, pk__in=ids, is_read=False).update(is_read=True)
+        unread.adjust({request.user.pk: -updated})
+        return Response({"updated": updated})
+
+    @action(detail=False, methods=['post'], url_path='stream-token')
+    def stream_token(self, request):
+        """A short-lived token for ``?token=`` on the notification stream."""
+        return Response({
+            "token": str(StreamToken.for_user(request.user)),
+            "expires_in": int(StreamToken.lifetime.total_seconds()),
+        })
+
+    @action(detail=False, methods=['get'], permission_classes=[AllowAny], authentication_classes=[])
+    def stream(self, request):
+        # Only reached when Django serves the path itself, i.e. without skillbridge.asgi in front.
+        return Response(
+            {"detail": "The notification stream needs the ASGI deployment; poll this list instead."},
+            status=status.HTTP_503_SERVICE_UNAVAILABLE,
+        )
@@ -1,4 +1,5 @@
 from django.contrib import admin
-from orders.models import Order
+from orders.models import Order, StripeEvent
 # Register your models here.
-admin.site.register(Order)
\ No newline at end of file
+admin.site.register(Order)
+admin.site.register(StripeEvent)
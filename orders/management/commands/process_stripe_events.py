@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+from orders import webhooks
+
+
+class Command(BaseCommand):
+    help = "Apply stored Stripe webhook events in batches (mark orders paid)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument('--loop', action='store_true', help="Keep polling for new events.")
+        parser.add_argument('--interval', type=float, default=2.0, help="Seconds to sleep when the inbox is empty.")
+
+    def handle(self, *args, **options):
+        total = 0
+        while True:
+            handled = webhooks.process_pending(batch_size=options['batch_size'])
+            total += handled
+            if handled:
+                continue
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+        self.stdout.write(self.style.SUCCESS(f"Processed {total} Stripe events."))
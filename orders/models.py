@@ -28,7 +28,62 @@ class Order(models.Model):
     def __str__(self):
         return f"Order #{self.id} | {self.buyer.username} → {self.service.title} [{self.status}]"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.remember_loaded_state()
+        return instance
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        # post_save receivers have seen the old state by now; later saves compare against this one.
+        self.remember_loaded_state()
+
+    def remember_loaded_state(self):
+        # Lets post_save receivers tell whether status/is_paid really changed without re-reading the row.
+        self._loaded_state = (self.__dict__.get('status'), self.__dict__.get('is_paid'))
+
+    @property
+    def loaded_state(self):
+        return getattr(self, '_loaded_state', (None, None))
+
     class Meta:
         ordering = ['-order_date']
         verbose_name = "Order"
         verbose_name_plural = "Orders"
+        indexes = [
+            models.Index(fields=['buyer', 'status'], name='order_buyer_status_idx'),
+            models.Index(fields=['service', 'buyer', 'status'], name='order_service_buyer_status_idx'),
+            models.Index(
+                fields=['buyer', 'service'],
+                condition=models.Q(status='completed'),
+                name='order_completed_purchase_idx',
+            ),
+            # dashboard.rollups scans orders by updated_at and re-reads whole days by order_date.
+            models.Index(fields=['updated_at'], name='order_updated_at_idx'),
+            models.Index(fields=['order_date'], name='order_date_idx'),
+        ]
+
+
+class StripeEvent(models.Model):
+    """Append-only inbox of verified Stripe webhook events, one row per event id."""
+    event_id = models.CharField(max_length=255, unique=True)
+    type = models.CharField(max_length=100)
+    payload = models.JSONField()
+    received_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+
+    def __str__(self):
+        return f"{self.type} ({self.event_id})"
+
+    class Meta:
+        ordering = ['received_at']
+        indexes = [
+            models.Index(
+                fields=['received_at'],
+                condition=models.Q(processed_at__isnull=True),
+                name='stripe_event_pending_idx',
+            ),
+        ]
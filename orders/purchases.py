@@ -0,0 +1,46 @@
+"""Per-user cache of the service ids a buyer has completed orders for.
+
+Backs the "has ordered" checks so a page of service cards costs one cache
+read instead of one query per card. The set is dropped after commit whenever
+one of the user's orders enters or leaves ``completed``.
+
+Dropping the set only reaches other workers through a shared cache backend;
+with the per-process local-memory cache sets live for ``LOCAL_CACHE_TIMEOUT``
+instead of ``PURCHASE_CACHE_TIMEOUT`` (see ``api.caching``).
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from api.caching import coherent_timeout
+from .models import Order
+
+
+def purchases_cache_key(user_id):
+    return f'orders:purchases:{user_id}'
+
+
+def purchased_service_ids(user_id):
+    key = purchases_cache_key(user_id)
+    service_ids = cache.get(key)
+    if service_ids is None:
+        service_ids = frozenset(
+            Order.objects.filter(buyer_id=user_id, status=Order.COMPLETED)
+            .order_by()
+            .values_list('service_id', flat=True)
+            .distinct()
+        )
+        cache.set(key, service_ids, coherent_timeout(settings.PURCHASE_CACHE_TIMEOUT))
+    return service_ids
+
+
+def has_ordered(user_id, service_ids):
+    """Map each of ``service_ids`` to whether the user completed an order for it."""
+    purchased = purchased_service_ids(user_id)
+    return {service_id: service_id in purchased for service_id in service_ids}
+
+
+def forget_purchases(*user_ids):
+    keys = [purchases_cache_key(user_id) for user_id in set(user_ids)]
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many(keys))
@@ -0,0 +1,28 @@
+"""Querysets that load exactly what the order serializers render.
+
+Every relation a serializer touches is either joined or prefetched, so a page
+of orders costs the same few queries whatever its size.
+"""
+from django.db.models import Prefetch, Q
+
+from api.dynamic_fields import shape_queryset
+from services.models import ServiceImage
+from .models import Order
+from .serializers import OrderSummarySerializer
+
+
+def ready_images(lookup):
+    return Prefetch(lookup, queryset=ServiceImage.objects.filter(status=ServiceImage.READY).order_by('id'))
+
+
+def with_related(queryset, serializer_class, request=None):
+    if issubclass(serializer_class, OrderSummarySerializer):
+        return queryset.select_related('service').prefetch_related(ready_images('service__images'))
+    return shape_queryset(queryset, serializer_class, request)
+
+
+def orders_visible_to(user):
+    """Orders ``user`` may look at: their own purchases, orders for their services, or all for staff."""
+    if user.is_staff:
+        return Order.objects.all()
+    return Order.objects.filter(Q(buyer=user) | Q(service__seller=user))
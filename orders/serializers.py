@@ -1,15 +1,20 @@
 from rest_framework import serializers
 from .models import Order
 from services.models import Service
-from services.serializers import ServiceSerializer
+from services.serializers import ServiceSerializer, ServiceSummarySerializer
+from api.dynamic_fields import DynamicFieldsMixin
 
-class OrderSerializer(serializers.ModelSerializer):
+class OrderSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     service = ServiceSerializer(read_only=True)
     service_id = serializers.PrimaryKeyRelatedField(
         queryset=Service.objects.all(), source='service', write_only=True
     )
     is_paid = serializers.BooleanField(read_only=True)
 
+    expandable_fields = {
+        'service': {'serializer': ServiceSerializer},
+    }
+
     class Meta:
         model = Order
         fields = [
@@ -23,13 +28,34 @@ class OrderSerializer(serializers.ModelSerializer):
             'updated_at',
             'order_date'
         ]
-        read_only_fields = ['id', 'buyer', 'created_at', 'updated_at']
+        # Status only changes through the state machine (``update_status``).
+        read_only_fields = ['id', 'buyer', 'status', 'created_at', 'updated_at']
 
     def create(self, validated_data):
         validated_data['buyer'] = self.context['request'].user
         return super().create(validated_data)
 
 
+class OrderSummarySerializer(serializers.ModelSerializer):
+    """Compact list row: the order plus the service's id, title, price and thumbnail."""
+    service = ServiceSummarySerializer(read_only=True)
+
+    class Meta:
+        model = Order
+        fields = ['id', 'buyer', 'service', 'status', 'is_paid', 'created_at', 'updated_at', 'order_date']
+        read_only_fields = fields
+
+
 class CheckoutSessionSerializer(serializers.Serializer):
     order_id = serializers.IntegerField()
     service_id = serializers.IntegerField()
+
+
+BULK_STATUS_MAX_IDS = 500
+
+
+class BulkStatusUpdateSerializer(serializers.Serializer):
+    order_ids = serializers.ListField(
+        child=serializers.IntegerField(), allow_empty=False, max_length=BULK_STATUS_MAX_IDS
+    )
+    status = serializers.CharField()
@@ -1,24 +1,52 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
+from api.conditional import bump_counter
 from .models import Order
-from notifications.models import Notification
+from .purchases import forget_purchases
+from .stripe_client import forget_checkout_sessions
+from .transitions import order_transitioned
+
+# Moved by every order deletion; the admin dashboard's ETag cannot see deletions otherwise.
+ORDER_DELETIONS_COUNTER = 'orders:deleted'
+
 
 @receiver(post_save, sender=Order)
-def create_notification_for_order_update(sender, instance, **kwargs):
-    if instance.status == 'completed':
-        message = f"Your order {instance.id} has been completed."
-    elif instance.status == 'in_progress':
-        message = f"Your order {instance.id} is now in progress."
-    else:
-        message = f"Your order {instance.id} is still pending."
-
-    Notification.objects.create(
-        user=instance.buyer,
-        order=instance,
-        message=message
-    )
-    Notification.objects.create(
-        user=instance.service.seller,
-        order=instance,
-        message=message
-    )
+def forget_purchases_on_save(sender, instance, created, **kwargs):
+    previous_status, _ = instance.loaded_state
+    if (instance.status == Order.COMPLETED) != (previous_status == Order.COMPLETED):
+        forget_purchases(instance.buyer_id)
+
+
+@receiver(post_save, sender=Order)
+def forget_checkout_session_on_save(sender, instance, created, **kwargs):
+    previous_status, previous_paid = instance.loaded_state
+    closed = instance.status != previous_status and instance.status in (Order.COMPLETED, Order.CANCELED)
+    if closed or (instance.is_paid and not previous_paid):
+        forget_checkout_sessions(instance.pk)
+
+
+@receiver(post_delete, sender=Order)
+def forget_purchases_on_delete(sender, instance, **kwargs):
+    if instance.status == Order.COMPLETED:
+        forget_purchases(instance.buyer_id)
+
+
+@receiver(post_delete, sender=Order)
+def count_deletion(sender, instance, **kwargs):
+    bump_counter(ORDER_DELETIONS_COUNTER)
+
+
+@receiver(order_transitioned)
+def forget_purchases_on_transition(sender, transitions, **kwargs):
+    forget_purchases(*[
+        transition.buyer_id for transition in transitions
+        if Order.COMPLETED in (transition.from_status, transition.to_status)
+    ])
+
+
+@receiver(order_transitioned)
+def forget_checkout_sessions_on_transition(sender, transitions, **kwargs):
+    forget_checkout_sessions(*[
+        transition.order_id for transition in transitions
+        if transition.paid or transition.to_status in (Order.COMPLETED, Order.CANCELED)
+    ])
@@ -0,0 +1,175 @@
+"""Stripe access for checkout: pooled HTTP, hard timeouts and a circuit breaker.
+
+``get_gateway()`` returns the process-wide gateway named by
+``STRIPE_GATEWAY``; tests can swap in ``FakeStripeGateway`` through that
+setting or ``set_gateway()``. ``checkout_session_for`` reuses an order's open
+checkout session from the cache until it is about to expire instead of
+creating a new one on every click; ``orders.signals`` drops it once the
+order is paid, completed or canceled.
+"""
+import threading
+import time
+import uuid
+from types import SimpleNamespace
+
+import requests
+import stripe
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.module_loading import import_string
+from requests.adapters import HTTPAdapter
+
+# Errors that mean Stripe itself is unhealthy, as opposed to a bad request from us.
+PROVIDER_ERRORS = (stripe.APIConnectionError, stripe.APIError, stripe.RateLimitError)
+
+SESSION_REUSE_MARGIN = 60
+
+
+class CircuitOpenError(Exception):
+    pass
+
+
+class CircuitBreaker:
+    """Fail fast after ``failure_threshold`` consecutive provider errors.
+
+    After ``reset_timeout`` seconds one trial call is let through; success
+    closes the circuit again, failure re-opens it.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30, errors=PROVIDER_ERRORS):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.errors = errors
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._trial_running = False
+
+    @property
+    def is_open(self):
+        return self._opened_at is not None
+
+    def _before_call(self):
+        with self._lock:
+            if self._opened_at is None:
+                return
+            if self._trial_running or time.monotonic() - self._opened_at < self.reset_timeout:
+                raise CircuitOpenError("Payment provider is unavailable, try again shortly.")
+            self._trial_running = True
+
+    def _record(self, failed):
+        with self._lock:
+            self._trial_running = False
+            if not failed:
+                self._failures = 0
+                self._opened_at = None
+                return
+            self._failures += 1
+            if self._opened_at is not None or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+
+    def call(self, func, *args, **kwargs):
+        self._before_call()
+        try:
+            result = func(*args, **kwargs)
+        except self.errors:
+            self._record(failed=True)
+            raise
+        except Exception:
+            self._record(failed=False)
+            raise
+        self._record(failed=False)
+        return result
+
+
+class StripeGateway:
+    def __init__(self):
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=settings.STRIPE_POOL_SIZE)
+        session.mount('https://', adapter)
+        self.client = stripe.StripeClient(
+            settings.STRIPE_SECRET_KEY,
+            http_client=stripe.RequestsClient(timeout=settings.STRIPE_TIMEOUT, session=session),
+            max_network_retries=settings.STRIPE_MAX_NETWORK_RETRIES,
+        )
+        self.breaker = CircuitBreaker(settings.STRIPE_CIRCUIT_FAILURES, settings.STRIPE_CIRCUIT_RESET)
+
+    def create_checkout_session(self, params):
+        return self.breaker.call(self.client.checkout.sessions.create, params=params)
+
+
+class FakeStripeGateway:
+    """In-memory stand-in that records calls and returns predictable sessions."""
+
+    def __init__(self):
+        self.calls = []
+
+    def create_checkout_session(self, params):
+        self.calls.append(params)
+        session_id = f'cs_test_{uuid.uuid4().hex[:16]}'
+        return SimpleNamespace(
+            id=session_id,
+            url=f'https://checkout.stripe.test/{session_id}',
+            expires_at=int(time.time()) + 24 * 60 * 60,
+        )
+
+
+_gateway = None
+_gateway_lock = threading.Lock()
+
+
+def get_gateway():
+    global _gateway
+    if _gateway is None:
+        with _gateway_lock:
+            if _gateway is None:
+                _gateway = import_string(settings.STRIPE_GATEWAY)()
+    return _gateway
+
+
+def set_gateway(gateway):
+    global _gateway
+    _gateway = gateway
+
+
+def session_cache_key(order_id):
+    return f'orders:checkout-session:{order_id}'
+
+
+def forget_checkout_sessions(*order_ids):
+    """Drop cached sessions once the current transaction commits; called when orders are paid or closed."""
+    keys = [session_cache_key(order_id) for order_id in set(order_ids)]
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def checkout_session_for(order, service):
+    """Return ``(url, reused)`` for an open checkout session for ``order``."""
+    amount = int(service.price * 100)
+    key = session_cache_key(order.pk)
+    cached = cache.get(key)
+    if cached and cached['amount'] == amount and cached['expires_at'] - SESSION_REUSE_MARGIN > time.time():
+        return cached['url'], True
+
+    session = get_gateway().create_checkout_session(
+        {
+            'payment_method_types': ['card'],
+            'line_items': [{
+                'price_data': {
+                    'currency': 'usd',
+                    'product_data': {'name': service.title},
+                    'unit_amount': amount,
+                },
+                'quantity': 1,
+            }],
+            'mode': 'payment',
+            'success_url': f"{settings.FRONTEND_URL}/payment/status/?order_id={order.id}&alert=success",
+            'cancel_url': f"{settings.FRONTEND_URL}/payment/status/?order_id={order.id}&alert=cancel",
+            'metadata': {'order_id': str(order.id)},
+        }
+    )
+    ttl = int(session.expires_at - time.time() - SESSION_REUSE_MARGIN)
+    if ttl > 0:
+        cache.set(key, {'url': session.url, 'id': session.id, 'amount': amount, 'expires_at': session.expires_at}, ttl)
+    return session.url, False
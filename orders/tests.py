@@ -1,3 +1,212 @@
-from django.test import TestCase
+import hashlib
+import hmac
+import json
+import time
 
-# Create your tests here.
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from api.testing import as_worker, make_service, make_user, seconds_later
+from services.models import ServiceImage
+from . import purchases, stripe_client, transitions
+from .models import Order, StripeEvent
+from .webhooks import process_pending
+
+WEBHOOK_URL = '/api/v1/stripe/webhook/'
+
+
+def sign_payload(payload, secret, timestamp=None):
+    """Build a ``Stripe-Signature`` header for ``payload`` the way Stripe does."""
+    timestamp = int(timestamp if timestamp is not None else time.time())
+    signature = hmac.new(secret.encode(), f'{timestamp}.{payload}'.encode(), hashlib.sha256).hexdigest()
+    return f't={timestamp},v1={signature}'
+
+
+class StripeWebhookTests(TestCase):
+    def post_event(self, body, signature):
+        return APIClient().post(
+            WEBHOOK_URL, body, content_type='application/json', HTTP_STRIPE_SIGNATURE=signature
+        )
+
+    @override_settings(STRIPE_WEBHOOK_SECRET='')
+    def test_rejects_events_without_a_configured_secret(self):
+        payload = json.dumps({'id': 'evt_1', 'type': 'checkout.session.completed'})
+        response = self.post_event(payload, sign_payload(payload, ''))
+        self.assertEqual(response.status_code, 503)
+
+    @override_settings(STRIPE_WEBHOOK_SECRET='whsec_test')
+    def test_stores_signed_events_once(self):
+        payload = json.dumps({'id': 'evt_1', 'type': 'checkout.session.completed'})
+        for _ in range(2):
+            response = self.post_event(payload, sign_payload(payload, 'whsec_test'))
+            self.assertEqual(response.status_code, 200)
+        self.assertEqual(StripeEvent.objects.filter(event_id='evt_1').count(), 1)
+
+    @override_settings(STRIPE_WEBHOOK_SECRET='whsec_test')
+    def test_rejects_bad_signatures(self):
+        payload = json.dumps({'id': 'evt_1', 'type': 'checkout.session.completed'})
+        response = self.post_event(payload, sign_payload(payload, 'whsec_other'))
+        self.assertEqual(response.status_code, 400)
+
+    @override_settings(STRIPE_WEBHOOK_SECRET='whsec_test')
+    def test_rejects_bodies_that_are_not_utf8(self):
+        response = self.post_event(b'\xff\xfe', 't=1,v1=x')
+        self.assertEqual(response.status_code, 400)
+
+
+class PaymentEventTests(TestCase):
+    def setUp(self):
+        seller = make_user('seller', 'seller')
+        self.buyer = make_user('buyer')
+        self.service = make_service(seller)
+
+    def pay(self, order):
+        session = {'payment_status': 'paid', 'metadata': {'order_id': str(order.pk)}}
+        StripeEvent.objects.create(
+            event_id=f'evt_{order.pk}', type='checkout.session.completed',
+            payload={'data': {'object': session}},
+        )
+        process_pending()
+        order.refresh_from_db()
+
+    def test_pays_and_completes_a_pending_order(self):
+        order = Order.objects.create(buyer=self.buyer, service=self.service)
+        self.pay(order)
+        self.assertEqual((order.status, order.is_paid), (Order.COMPLETED, True))
+
+    def test_ignores_payments_for_canceled_orders(self):
+        order = Order.objects.create(buyer=self.buyer, service=self.service, status=Order.CANCELED)
+        with self.assertLogs('orders.webhooks', 'WARNING'):
+            self.pay(order)
+        self.assertEqual((order.status, order.is_paid), (Order.CANCELED, False))
+        self.assertIsNotNone(StripeEvent.objects.get(event_id=f'evt_{order.pk}').processed_at)
+
+
+
+@override_settings(LOCAL_CACHE_TIMEOUT=5, PURCHASE_CACHE_TIMEOUT=3600)
+class PurchaseCacheTests(TestCase):
+    def setUp(self):
+        seller = make_user('seller', 'seller')
+        self.buyer = make_user('buyer')
+        self.service = make_service(seller)
+
+    def test_purchase_in_another_worker_is_seen_after_the_local_timeout(self):
+        order = Order.objects.create(buyer=self.buyer, service=self.service)
+        with as_worker('a'):
+            self.assertFalse(purchases.has_ordered(self.buyer.pk, [self.service.pk])[self.service.pk])
+        with as_worker('b'), self.captureOnCommitCallbacks(execute=True):
+            order.status = Order.COMPLETED
+            order.save()
+        with as_worker('a'):
+            with seconds_later(6):
+                self.assertTrue(purchases.has_ordered(self.buyer.pk, [self.service.pk])[self.service.pk])
+
+
+class StatusUpdateTests(TestCase):
+    def setUp(self):
+        self.seller = make_user('seller', 'seller')
+        self.buyer = make_user('buyer')
+        self.order = Order.objects.create(buyer=self.buyer, service=make_service(self.seller))
+        self.client = APIClient()
+
+    def test_unknown_pks_are_not_found(self):
+        self.client.force_authenticate(self.seller)
+        for pk in ('abc', '999'):
+            response = self.client.patch(f'/api/v1/orders/{pk}/update_status/', {'status': Order.COMPLETED}, format='json')
+            self.assertEqual(response.status_code, 404, pk)
+
+    def test_seller_moves_order_through_the_state_machine(self):
+        self.client.force_authenticate(self.seller)
+        response = self.client.patch(f'/api/v1/orders/{self.order.pk}/update-status/', {'status': Order.COMPLETED}, format='json')
+        self.assertEqual(response.status_code, 200)
+        response = self.client.patch(f'/api/v1/orders/{self.order.pk}/update-status/', {'status': Order.PENDING}, format='json')
+        self.assertEqual(response.status_code, 409)
+
+    def test_plain_updates_cannot_change_status(self):
+        self.client.force_authenticate(self.buyer)
+        response = self.client.patch(f'/api/v1/orders/{self.order.pk}/', {'status': Order.COMPLETED}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.status, Order.PENDING)
+
+
+class CompactListTests(TestCase):
+    def setUp(self):
+        self.buyer = make_user('buyer')
+        self.service = make_service(make_user('seller', 'seller'))
+        ServiceImage.objects.create(service=self.service, status=ServiceImage.PENDING)
+        ServiceImage.objects.create(service=self.service, variants={'thumbnail': '/thumb.jpg', 'large': '/large.jpg'})
+        self.client = APIClient()
+        self.client.force_authenticate(self.buyer)
+
+    def compact_list(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/v1/orders/?compact=true')
+        return response.data['results'], len(queries)
+
+    def test_rows_carry_only_the_service_summary(self):
+        Order.objects.create(buyer=self.buyer, service=self.service)
+        [row], _ = self.compact_list()
+        self.assertEqual(row['service'], {'id': self.service.pk, 'title': 'Logo', 'price': '5.00', 'thumbnail': '/thumb.jpg'})
+
+    def test_query_count_does_not_grow_with_the_page(self):
+        Order.objects.create(buyer=self.buyer, service=self.service)
+        _, few = self.compact_list()
+        other = make_service(self.service.seller, title='Banner')
+        for service in [self.service, other] * 4 + [other]:
+            Order.objects.create(buyer=self.buyer, service=service)
+        rows, many = self.compact_list()
+        self.assertEqual(len(rows), 10)
+        self.assertEqual(many, few)
+
+
+class BulkStatusUpdateTests(TestCase):
+    def setUp(self):
+        self.seller = make_user('seller', 'seller')
+        buyer = make_user('buyer')
+        service = make_service(self.seller)
+        self.order = Order.objects.create(buyer=buyer, service=service)
+        self.client = APIClient()
+        self.client.force_authenticate(self.seller)
+
+    def post(self, body):
+        return self.client.post('/api/v1/orders/bulk-update-status/', body, format='json')
+
+    def test_rejects_bodies_that_are_not_objects(self):
+        self.assertEqual(self.post([self.order.pk]).status_code, 400)
+
+    def test_rejects_invalid_ids(self):
+        self.assertEqual(self.post({'order_ids': [], 'status': Order.COMPLETED}).status_code, 400)
+        self.assertEqual(self.post({'order_ids': ['x'], 'status': Order.COMPLETED}).status_code, 400)
+        self.assertEqual(self.post({'order_ids': list(range(1, 502)), 'status': Order.COMPLETED}).status_code, 400)
+
+    def test_updates_orders(self):
+        response = self.post({'order_ids': [self.order.pk], 'status': Order.COMPLETED})
+        self.assertEqual(response.data['updated'], 1)
+
+
+class CheckoutSessionCacheTests(TestCase):
+    def setUp(self):
+        self.seller = make_user('seller', 'seller')
+        buyer = make_user('buyer')
+        self.service = make_service(self.seller)
+        self.order = Order.objects.create(buyer=buyer, service=self.service)
+        stripe_client.set_gateway(stripe_client.FakeStripeGateway())
+        self.addCleanup(stripe_client.set_gateway, None)
+        cache.clear()
+
+    def test_session_is_reused_while_the_order_is_open(self):
+        url, reused = stripe_client.checkout_session_for(self.order, self.service)
+        self.assertEqual(stripe_client.checkout_session_for(self.order, self.service), (url, True))
+
+    def test_canceled_then_reopened_order_gets_a_new_session(self):
+        url, _ = stripe_client.checkout_session_for(self.order, self.service)
+        with self.captureOnCommitCallbacks(execute=True):
+            transitions.transition(self.order.pk, Order.CANCELED, seller=self.seller)
+        transitions.transition(self.order.pk, Order.PENDING, seller=self.seller)
+        new_url, reused = stripe_client.checkout_session_for(self.order, self.service)
+        self.assertFalse(reused)
+        self.assertNotEqual(new_url, url)
@@ -0,0 +1,150 @@
+"""Order state machine.
+
+``TRANSITIONS`` declares the legal status changes. ``transition`` applies one
+as a compare-and-set: a single ``UPDATE ... WHERE status=<expected>`` that
+also checks ownership, so concurrent requests cannot both win and no row is
+loaded up front. Every applied change is announced through
+``order_transitioned`` after the write.
+"""
+from collections import defaultdict, namedtuple
+
+from django.db import transaction
+from django.dispatch import Signal
+from django.utils import timezone
+
+from .models import Order
+
+TRANSITIONS = {
+    Order.PENDING: (Order.COMPLETED, Order.CANCELED),
+    Order.CANCELED: (Order.PENDING,),
+}
+
+Transition = namedtuple('Transition', ['order_id', 'buyer_id', 'seller_id', 'from_status', 'to_status', 'paid'])
+
+STATE_FIELDS = ('pk', 'status', 'is_paid', 'buyer_id', 'service__seller_id')
+
+# Sent with ``transitions=[Transition, ...]`` once the rows have been updated.
+order_transitioned = Signal()
+
+
+class TransitionError(Exception):
+    NOT_FOUND = 'not_found'
+    FORBIDDEN = 'forbidden'
+    INVALID = 'invalid'
+    UNCHANGED = 'unchanged'
+    ILLEGAL = 'illegal'
+
+    def __init__(self, reason, message):
+        super().__init__(message)
+        self.reason = reason
+
+
+def sources_for(target):
+    return [source for source, targets in TRANSITIONS.items() if target in targets]
+
+
+def announce(transitions):
+    if transitions:
+        order_transitioned.send(sender=Order, transitions=transitions)
+
+
+def check(row, target, seller=None, buyer=None, mark_paid=False):
+    """Why the order in ``row`` (``STATE_FIELDS`` minus pk, or ``None``) cannot move to ``target``, if it cannot."""
+    if row is None:
+        return TransitionError(TransitionError.NOT_FOUND, "Order not found.")
+    current, is_paid, buyer_id, seller_id = row
+    if (seller is not None and seller_id != seller.pk) or (buyer is not None and buyer_id != buyer.pk):
+        return TransitionError(TransitionError.FORBIDDEN, "You are not authorized to update this order.")
+    if mark_paid and is_paid:
+        return TransitionError(TransitionError.UNCHANGED, "Order is already paid.")
+    if current == target and not mark_paid:
+        return TransitionError(TransitionError.UNCHANGED, "Order is already in the requested status.")
+    if current != target and current not in sources_for(target):
+        return TransitionError(TransitionError.ILLEGAL, f"Cannot move an order from '{current}' to '{target}'.")
+    return None
+
+
+def validate_target(target):
+    if target not in dict(Order.ORDER_STATUS_CHOICES):
+        raise TransitionError(TransitionError.INVALID, "Invalid status value.")
+
+
+def order_pk(order_id):
+    """``order_id`` as an int; anything that cannot name an order is reported as not found."""
+    try:
+        return int(order_id)
+    except (TypeError, ValueError):
+        raise TransitionError(TransitionError.NOT_FOUND, "Order not found.") from None
+
+
+def transition(order_id, target, seller=None, buyer=None, mark_paid=False):
+    """Move an order to ``target``; returns the ``Transition`` or raises ``TransitionError``.
+
+    ``seller``/``buyer`` restrict the update to orders the user owns in that
+    role. With ``mark_paid`` the order is also flagged paid, and an unpaid
+    order already in ``target`` just records the payment.
+    """
+    validate_target(target)
+    order_id = order_pk(order_id)
+
+    owned = Order.objects.filter(pk=order_id)
+    if seller is not None:
+        owned = owned.filter(service__seller=seller)
+    if buyer is not None:
+        owned = owned.filter(buyer=buyer)
+
+    changes = {'status': target, 'updated_at': timezone.now()}
+    expected = sources_for(target)
+    if mark_paid:
+        owned = owned.filter(is_paid=False)
+        changes['is_paid'] = True
+        expected.append(target)
+
+    for source in expected:
+        if owned.filter(status=source).update(**changes):
+            row = Order.objects.filter(pk=order_id).values_list('buyer_id', 'service__seller_id').first()
+            applied = Transition(order_id, row[0], row[1], source, target, mark_paid)
+            announce([applied])
+            return applied
+
+    row = Order.objects.filter(pk=order_id).values_list(*STATE_FIELDS[1:]).first()
+    raise check(row, target, seller, buyer, mark_paid) or TransitionError(
+        TransitionError.ILLEGAL, "The order was changed concurrently; try again."
+    )
+
+
+def transition_many(order_ids, target, seller=None, buyer=None):
+    """Move many orders to ``target`` at once.
+
+    The orders are read and locked in one query that also carries their
+    owners, then every eligible order is updated with one conditional
+    ``UPDATE`` per source status (a single one for today's transitions).
+    Returns ``(applied, errors)``: the ``Transition``s and a
+    ``{order_id: TransitionError}`` map for the rest.
+    """
+    validate_target(target)
+    order_ids = list(dict.fromkeys(order_ids))
+    with transaction.atomic():
+        rows = {
+            pk: rest
+            for pk, *rest in Order.objects.select_for_update(of=('self',))
+            .filter(pk__in=order_ids)
+            .values_list(*STATE_FIELDS)
+        }
+        errors = {}
+        by_source = defaultdict(list)
+        for order_id in order_ids:
+            row = rows.get(order_id)
+            error = check(row, target, seller, buyer)
+            if error is None:
+                by_source[row[0]].append(order_id)
+            else:
+                errors[order_id] = error
+
+        now = timezone.now()
+        applied = []
+        for source, ids in by_source.items():
+            Order.objects.filter(pk__in=ids, status=source).update(status=target, updated_at=now)
+            applied += [Transition(pk, rows[pk][2], rows[pk][3], source, target, False) for pk in ids]
+        announce(applied)
+    return applied, errors
@@ -1,17 +1,37 @@
 from rest_framework import status, viewsets
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-from rest_framework.decorators import action, api_view
+from rest_framework.decorators import action, api_view, authentication_classes, permission_classes
+from rest_framework.permissions import AllowAny
 from django.conf import settings
 from .models import Order
-from .serializers import OrderSerializer, CheckoutSessionSerializer
+from .serializers import OrderSerializer, OrderSummarySerializer, CheckoutSessionSerializer, BulkStatusUpdateSerializer
 from services.models import Service
 from drf_yasg.utils import swagger_auto_schema
+import logging
 import stripe
 from rest_framework.views import APIView
-from notifications.models import Notification  
+from users.authentication import CLAIM_AUTHENTICATION_CLASSES
+from . import purchases, queries, webhooks, stripe_client, transitions
 
 stripe.api_key = settings.STRIPE_SECRET_KEY
+logger = logging.getLogger(__name__)
+
+TRANSITION_ERROR_STATUS = {
+    transitions.TransitionError.NOT_FOUND: status.HTTP_404_NOT_FOUND,
+    transitions.TransitionError.FORBIDDEN: status.HTTP_403_FORBIDDEN,
+    transitions.TransitionError.INVALID: status.HTTP_400_BAD_REQUEST,
+    transitions.TransitionError.UNCHANGED: status.HTTP_400_BAD_REQUEST,
+    transitions.TransitionError.ILLEGAL: status.HTTP_409_CONFLICT,
+}
+
+
+def transition_error_response(error):
+    return Response({"error": str(error)}, status=TRANSITION_ERROR_STATUS[error.reason])
+
+
+HAS_ORDERED_MAX_IDS = 200
+
 
 class OrderViewSet(viewsets.ModelViewSet):
     serializer_class = OrderSerializer
@@ -21,13 +41,33 @@ class OrderViewSet(viewsets.ModelViewSet):
         if getattr(self, 'swagger_fake_view', False):
             return Order.objects.none()
         user = self.request.user
-        if user.is_staff:
-            return Order.objects.all()
-        return Order.objects.filter(buyer=user)
+        queryset = Order.objects.all() if user.is_staff else Order.objects.filter(buyer=user)
+        return queries.with_related(queryset, self.get_serializer_class(), self.request)
+
+    def get_serializer_class(self):
+        # ``?compact=true`` lists orders with only the service's id, title, price and thumbnail.
+        if self.action == 'list' and self.request.query_params.get('compact') == 'true':
+            return OrderSummarySerializer
+        return super().get_serializer_class()
 
     def perform_create(self, serializer):
         serializer.save(buyer=self.request.user)
 
+    @swagger_auto_schema(
+        operation_summary="Check several services for completed orders",
+        operation_description="Pass `?service_ids=1,2,3`; returns `{\"hasOrdered\": {\"1\": true, ...}}`.",
+    )
+    @action(detail=False, methods=['get'], url_path='has-ordered', authentication_classes=CLAIM_AUTHENTICATION_CLASSES)
+    def has_ordered(self, request):
+        raw_ids = [value.strip() for value in request.query_params.get('service_ids', '').split(',') if value.strip()]
+        if not raw_ids or not all(value.isdigit() for value in raw_ids):
+            return Response({"error": "service_ids must be a comma-separated list of ids."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(raw_ids) > HAS_ORDERED_MAX_IDS:
+            return Response({"error": f"At most {HAS_ORDERED_MAX_IDS} service ids per request."}, status=status.HTTP_400_BAD_REQUEST)
+
+        answers = purchases.has_ordered(request.user.pk, [int(value) for value in raw_ids])
+        return Response({"hasOrdered": {str(service_id): value for service_id, value in answers.items()}})
+
     @swagger_auto_schema(
         methods=['PATCH'],
         operation_summary="Update order status (for sellers only)",
@@ -36,27 +76,45 @@ class OrderViewSet(viewsets.ModelViewSet):
     )
     @action(detail=True, methods=['patch'], permission_classes=[IsAuthenticated])
     def update_status(self, request, pk=None):
-        order = self.get_object()
-        user = request.user
         new_status = request.data.get('status')
 
         if not new_status:
             return Response({"error": "Status field is required."}, status=status.HTTP_400_BAD_REQUEST)
 
-        valid_statuses = ['pending', 'completed', 'canceled']
-        if new_status not in valid_statuses:
-            return Response({"error": "Invalid status value."}, status=status.HTTP_400_BAD_REQUEST)
-
-        if order.service.seller != user:
-            return Response({"error": "You are not authorized to update this order."}, status=status.HTTP_403_FORBIDDEN)
-
-        if order.status == new_status:
-            return Response({"error": "Order is already in the requested status."}, status=status.HTTP_400_BAD_REQUEST)
-
-        order.status = new_status
-        order.save()
+        try:
+            transitions.transition(pk, new_status, seller=request.user)
+        except transitions.TransitionError as e:
+            return transition_error_response(e)
         return Response({"message": f"Order status updated to '{new_status}' successfully."}, status=status.HTTP_200_OK)
 
+    @swagger_auto_schema(
+        operation_summary="Update the status of many orders (for sellers only)",
+        operation_description="Body: `{\"order_ids\": [1, 2], \"status\": \"completed\"}`. Reports a result per order id.",
+        request_body=BulkStatusUpdateSerializer,
+    )
+    @action(detail=False, methods=['post'], url_path='bulk-update-status')
+    def bulk_update_status(self, request):
+        serializer = BulkStatusUpdateSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        order_ids = serializer.validated_data['order_ids']
+        new_status = serializer.validated_data['status']
+
+        try:
+            applied, errors = transitions.transition_many(order_ids, new_status, seller=request.user)
+        except transitions.TransitionError as e:
+            return transition_error_response(e)
+
+        updated = {transition.order_id for transition in applied}
+        results = []
+        for order_id in dict.fromkeys(order_ids):
+            if order_id in updated:
+                results.append({"id": order_id, "ok": True, "status": new_status})
+            else:
+                error = errors[order_id]
+                results.append({"id": order_id, "ok": False, "reason": error.reason, "error": str(error)})
+        return Response({"updated": len(updated), "results": results}, status=status.HTTP_200_OK)
+
 
 @swagger_auto_schema(
     method='post',
@@ -81,28 +139,17 @@ def create_checkout_session(request):
     except Order.DoesNotExist:
         return Response({"error": "Order not found."}, status=404)
 
+    if order.is_paid:
+        return Response({"error": "Order is already paid."}, status=400)
+
     try:
-        session = stripe.checkout.Session.create(
-            payment_method_types=["card"],
-            line_items=[{
-                "price_data": {
-                    "currency": "usd",
-                    "product_data": {
-                        "name": service.title,
-                    },
-                    "unit_amount": int(service.price * 100),
-                },
-                "quantity": 1,
-            }],
-            mode="payment",
-            success_url=f"{settings.FRONTEND_URL}/payment/status/?order_id={order.id}&alert=success",
-            cancel_url=f"{settings.FRONTEND_URL}/payment/status/?order_id={order.id}&alert=cancel",
-            metadata={"order_id": str(order.id)},
-        )
+        checkout_url, reused = stripe_client.checkout_session_for(order, service)
+    except stripe_client.CircuitOpenError as e:
+        return Response({"error": str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
     except Exception as e:
         return Response({"error": str(e)}, status=500)
 
-    return Response({"checkout_url": session.url})
+    return Response({"checkout_url": checkout_url, "reused": reused})
 
 
 @api_view(['POST'])
@@ -113,21 +160,11 @@ def payment_success(request):
         return Response({'error': 'Order ID is required'}, status=status.HTTP_400_BAD_REQUEST)
 
     try:
-        order = Order.objects.get(id=order_id)
-        order.status = "completed"
-        order.is_paid = True
-        order.save()
-
-        Notification.objects.create(
-            user=order.service.seller,
-            order=order,
-            message=f"You received a completed order from {order.buyer.username}"
-        )
-
+        transitions.transition(order_id, Order.COMPLETED, buyer=request.user, mark_paid=True)
         return Response({'message': 'Payment marked as successful and order completed'}, status=status.HTTP_200_OK)
 
-    except Order.DoesNotExist:
-        return Response({'error': 'Order not found'}, status=status.HTTP_404_NOT_FOUND)
+    except transitions.TransitionError as e:
+        return transition_error_response(e)
 
     except Exception as e:
         import logging
@@ -136,25 +173,41 @@ def payment_success(request):
         return Response({'error': 'Failed to update order status due to a server error.'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+@swagger_auto_schema(method='post', auto_schema=None)
+@api_view(['POST'])
+@authentication_classes([])
+@permission_classes([AllowAny])
+def stripe_webhook(request):
+    """Verify and store a Stripe event; the process_stripe_events worker applies it."""
+    try:
+        payload = request.body.decode('utf-8')
+        event = webhooks.verify(payload, request.META.get('HTTP_STRIPE_SIGNATURE', ''))
+    except webhooks.WebhookNotConfigured as e:
+        logger.error("Rejected Stripe webhook: %s", e)
+        return Response({"error": "Webhooks are not configured."}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+    except (ValueError, stripe.SignatureVerificationError):
+        return Response({"error": "Invalid payload or signature."}, status=status.HTTP_400_BAD_REQUEST)
+
+    webhooks.store(event)
+    return Response({"received": True})
+
+
 @api_view(['GET'])
 def get_order_by_id(request, order_id):
+    orders = queries.with_related(queries.orders_visible_to(request.user), OrderSerializer, request)
     try:
-        order = Order.objects.get(id=order_id)
+        order = orders.get(id=order_id)
     except Order.DoesNotExist:
         return Response({"error": "Order not found."}, status=status.HTTP_404_NOT_FOUND)
 
-    serializer = OrderSerializer(order)
+    serializer = OrderSerializer(order, context={'request': request})
     return Response(serializer.data)
 
 
 class HasOrderedProduct(APIView):
+    authentication_classes = CLAIM_AUTHENTICATION_CLASSES
     permission_classes = [IsAuthenticated]
 
     def get(self, request, service_id):
-        user = request.user
-        has_ordered = Order.objects.filter(
-            buyer=user,
-            service_id=service_id,
-            status='completed'
-        ).exists()
+        has_ordered = service_id in purchases.purchased_service_ids(request.user.pk)
         return Response({"hasOrdered": has_ordered})
@@ -0,0 +1,129 @@
+"""Stripe webhook ingestion and the worker that drains the event inbox.
+
+The endpoint only verifies the signature and inserts the raw event, ignoring
+ids it has already stored, so Stripe gets its 2xx in milliseconds and
+retries are harmless. ``process_pending`` later claims unprocessed events in
+batches and applies them.
+"""
+import json
+import logging
+
+import stripe
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from . import transitions
+from .models import Order, StripeEvent
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = 5
+PAID_EVENT_TYPES = {'checkout.session.completed', 'checkout.session.async_payment_succeeded'}
+
+
+class WebhookNotConfigured(Exception):
+    pass
+
+
+def verify(payload, signature_header):
+    """Return the decoded event or raise ``ValueError`` / ``stripe.SignatureVerificationError``.
+
+    Raises ``WebhookNotConfigured`` when ``STRIPE_WEBHOOK_SECRET`` is empty,
+    since anyone can sign a payload with an empty secret.
+    """
+    if not settings.STRIPE_WEBHOOK_SECRET:
+        raise WebhookNotConfigured("STRIPE_WEBHOOK_SECRET is not set.")
+    stripe.WebhookSignature.verify_header(
+        payload, signature_header, settings.STRIPE_WEBHOOK_SECRET, settings.STRIPE_WEBHOOK_TOLERANCE
+    )
+    event = json.loads(payload)
+    if not isinstance(event, dict) or not event.get('id') or not event.get('type'):
+        raise ValueError("Malformed event.")
+    return event
+
+
+def store(event):
+    """Insert the event in one statement, silently skipping ids already in the inbox."""
+    StripeEvent.objects.bulk_create(
+        [StripeEvent(event_id=event['id'], type=event['type'], payload=event)],
+        ignore_conflicts=True,
+    )
+
+
+def paid_order_id(event):
+    session = event.payload.get('data', {}).get('object', {})
+    if event.type not in PAID_EVENT_TYPES or session.get('payment_status') != 'paid':
+        return None
+    order_id = (session.get('metadata') or {}).get('order_id')
+    return int(order_id) if order_id and str(order_id).isdigit() else None
+
+
+def mark_orders_paid(order_ids):
+    """Complete and mark paid every listed order that is not paid yet; returns their ids.
+
+    Only orders that ``transitions.TRANSITIONS`` allows to become completed
+    (or that already are) are touched; payments for any other order, such as
+    a canceled one, are logged and left for someone to refund or reopen.
+    """
+    payable = transitions.sources_for(Order.COMPLETED) + [Order.COMPLETED]
+    orders = list(
+        Order.objects.select_for_update(of=('self',))
+        .filter(pk__in=order_ids, is_paid=False)
+        .values_list('pk', 'buyer_id', 'service__seller_id', 'status')
+    )
+    for pk, _, _, current in orders:
+        if current not in payable:
+            logger.warning("Ignoring payment for order %s: cannot move from '%s' to completed.", pk, current)
+    orders = [order for order in orders if order[3] in payable]
+    if not orders:
+        return []
+    paid_ids = [pk for pk, _, _, _ in orders]
+    Order.objects.filter(pk__in=paid_ids, status__in=payable).update(
+        is_paid=True, status=Order.COMPLETED, updated_at=timezone.now()
+    )
+    transitions.announce([
+        transitions.Transition(pk, buyer_id, seller_id, current, Order.COMPLETED, True)
+        for pk, buyer_id, seller_id, current in orders
+    ])
+    return paid_ids
+
+
+def process_pending(batch_size=100):
+    """Apply one batch of unprocessed events; returns how many were completed.
+
+    Events that fail stay in the inbox for a later run (fresh events are
+    claimed first) until ``MAX_ATTEMPTS`` is reached.
+    """
+    with transaction.atomic():
+        events = list(
+            StripeEvent.objects.select_for_update(skip_locked=True)
+            .filter(processed_at__isnull=True)
+            .order_by('attempts', 'received_at')[:batch_size]
+        )
+        if not events:
+            return 0
+
+        now = timezone.now()
+        order_ids, failed = set(), []
+        for event in events:
+            event.attempts += 1
+            try:
+                order_id = paid_order_id(event)
+            except (AttributeError, TypeError, ValueError) as exc:
+                event.error = str(exc)
+                failed.append(event)
+                continue
+            if order_id is not None:
+                order_ids.add(order_id)
+            event.processed_at = now
+            event.error = ''
+
+        mark_orders_paid(order_ids)
+
+        for event in failed:
+            logger.error("Stripe event %s failed (attempt %s): %s", event.event_id, event.attempts, event.error)
+            if event.attempts >= MAX_ATTEMPTS:
+                event.processed_at = now
+        StripeEvent.objects.bulk_update(events, ['processed_at', 'attempts', 'error'])
+    return sum(1 for event in events if event.processed_at is not None)
@@ -0,0 +1,97 @@
+"""Denormalized rating aggregates on ``Service``.
+
+Every review write shifts the aggregates with a single ``UPDATE`` built from
+``F()`` expressions, so concurrent reviews never lose increments and the
+catalog can show and sort by rating without grouping over reviews.
+"""
+from django.db.models import Case, Count, F, FloatField, Q, Sum, Value, When
+from django.db.models.functions import Cast
+from django.db.models.lookups import GreaterThan
+
+from services.cache import invalidate_services
+from services.models import Service
+
+STARS = range(1, 6)
+
+
+def star_field(rating):
+    return f'rating_{rating}_count'
+
+
+def apply_rating_change(service_id, added=None, removed=None):
+    """Add and/or remove one rating from a service's aggregates."""
+    count_delta = (added is not None) - (removed is not None)
+    total_delta = (added or 0) - (removed or 0)
+    new_count = F('rating_count') + count_delta
+    new_total = F('rating_total') + total_delta
+
+    updates = {
+        'rating_count': new_count,
+        'rating_total': new_total,
+        'rating_avg': Case(
+            When(GreaterThan(new_count, 0), then=Cast(new_total, FloatField()) / Cast(new_count, FloatField())),
+            default=Value(0.0),
+            output_field=FloatField(),
+        ),
+    }
+    if added != removed:
+        if added in STARS:
+            updates[star_field(added)] = F(star_field(added)) + 1
+        if removed in STARS:
+            updates[star_field(removed)] = F(star_field(removed)) - 1
+
+    Service.objects.filter(pk=service_id).update(**updates)
+    invalidate_services([service_id])
+
+
+def review_saved(previous, review):
+    """``previous`` is the ``(service_id, rating)`` stored before this save, if any."""
+    if previous is None:
+        apply_rating_change(review.service_id, added=review.rating)
+    elif previous == (review.service_id, review.rating):
+        return
+    elif previous[0] == review.service_id:
+        apply_rating_change(review.service_id, added=review.rating, removed=previous[1])
+    else:
+        apply_rating_change(previous[0], removed=previous[1])
+        apply_rating_change(review.service_id, added=review.rating)
+
+
+def review_deleted(review):
+    apply_rating_change(review.service_id, removed=review.rating)
+
+
+def rebuild(batch_size=1000):
+    """Recompute every service's aggregates from its reviews; returns the number updated."""
+    from reviews.models import Review
+
+    fields = ['rating_avg', 'rating_count', 'rating_total'] + [star_field(star) for star in STARS]
+    updated = 0
+    service_ids = list(Service.objects.order_by('pk').values_list('pk', flat=True))
+    for start in range(0, len(service_ids), batch_size):
+        batch = service_ids[start:start + batch_size]
+        stats = {
+            row['service_id']: row
+            for row in Review.objects.filter(service_id__in=batch).values('service_id').annotate(
+                count=Count('id'),
+                total=Sum('rating'),
+                **{star_field(star): Count('id', filter=Q(rating=star)) for star in STARS},
+            )
+        }
+        services = []
+        for service_id in batch:
+            row = stats.get(service_id, {})
+            count = row.get('count', 0)
+            total = row.get('total') or 0
+            service = Service(
+                pk=service_id,
+                rating_count=count,
+                rating_total=total,
+                rating_avg=total / count if count else 0.0,
+                **{star_field(star): row.get(star_field(star), 0) for star in STARS},
+            )
+            services.append(service)
+        Service.objects.bulk_update(services, fields)
+        invalidate_services(batch)
+        updated += len(services)
+    return updated
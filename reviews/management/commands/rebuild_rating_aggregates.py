@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from reviews import aggregates
+
+
+class Command(BaseCommand):
+    help = "Recompute rating_avg, rating_count and the star histogram of every service from its reviews."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        count = aggregates.rebuild(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt rating aggregates for {count} services."))
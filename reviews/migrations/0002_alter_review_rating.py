@@ -0,0 +1,39 @@
+# Generated by Django 5.1.7 on 2026-10-18 17:20
+
+import django.core.validators
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+
+def backfill_rating_aggregates(apps, schema_editor):
+    Review = apps.get_model('reviews', 'Review')
+    Service = apps.get_model('services', 'Service')
+    rows = Review.objects.values('service_id').annotate(
+        count=Count('id'),
+        total=Sum('rating'),
+        **{f'rating_{star}_count': Count('id', filter=Q(rating=star)) for star in range(1, 6)},
+    )
+    for row in rows:
+        Service.objects.filter(pk=row['service_id']).update(
+            rating_count=row['count'],
+            rating_total=row['total'] or 0,
+            rating_avg=(row['total'] or 0) / row['count'],
+            **{f'rating_{star}_count': row[f'rating_{star}_count'] for star in range(1, 6)},
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0001_initial'),
+        ('services', '0003_service_rating_aggregates'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='review',
+            name='rating',
+            field=models.PositiveIntegerField(default=1, validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(5)]),
+        ),
+        migrations.RunPython(backfill_rating_aggregates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.1.7 on 2026-10-18 17:22
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0002_order_indexes'),
+        ('reviews', '0002_alter_review_rating'),
+        ('services', '0005_service_category_price_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['service', '-created_at'], name='review_service_created_idx'),
+        ),
+    ]
@@ -1,15 +1,31 @@
-from django.db import models
+from django.core.validators import MaxValueValidator, MinValueValidator
+from django.db import models, transaction
 from users.models import CustomUser
 from services.models import Service
 from orders.models import Order
+from . import aggregates
 
 class Review(models.Model):
     buyer = models.ForeignKey(CustomUser, on_delete=models.CASCADE)
     service = models.ForeignKey(Service, on_delete=models.CASCADE, related_name='reviews')
     order = models.OneToOneField(Order, on_delete=models.CASCADE)  
-    rating = models.PositiveIntegerField(default=1)  
+    rating = models.PositiveIntegerField(default=1, validators=[MinValueValidator(1), MaxValueValidator(5)])
     comment = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['service', '-created_at'], name='review_service_created_idx'),
+        ]
+
     def __str__(self):
         return f"Review by {self.buyer.username} - {self.rating} Stars"
+
+    def save(self, *args, **kwargs):
+        # Keep Service rating aggregates in the same transaction as the review.
+        with transaction.atomic():
+            previous = None
+            if self.pk is not None:
+                previous = Review.objects.filter(pk=self.pk).values_list('service_id', 'rating').first()
+            super().save(*args, **kwargs)
+            aggregates.review_saved(previous, self)
@@ -1,10 +1,15 @@
 from rest_framework import serializers
 from .models import Review
 from users.serializers import UserSerializer
+from api.dynamic_fields import DynamicFieldsMixin
 
-class ReviewSerializer(serializers.ModelSerializer):
+class ReviewSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     buyer = UserSerializer(read_only=True)
 
+    expandable_fields = {
+        'buyer': {'serializer': UserSerializer},
+    }
+
     class Meta:
         model = Review
         fields = ['id', 'buyer', 'service', 'rating', 'comment', 'created_at']
@@ -0,0 +1,10 @@
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+from .models import Review
+from . import aggregates
+
+
+@receiver(post_delete, sender=Review)
+def remove_review_from_aggregates(sender, instance, **kwargs):
+    # Deletions (including cascades) already run inside the collector's transaction.
+    aggregates.review_deleted(instance)
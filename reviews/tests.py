@@ -1,3 +1,55 @@
+from io import StringIO
+
+from django.core.management import call_command
 from django.test import TestCase
 
-# Create your tests here.
+from api.testing import make_service, make_user
+from orders.models import Order
+from services.models import Service
+from .models import Review
+
+
+class RatingAggregateTests(TestCase):
+    def setUp(self):
+        seller = make_user('seller', 'seller')
+        self.service = make_service(seller)
+        self.other = make_service(seller, title='Banner')
+        self.buyers = [make_user(f'buyer{n}') for n in range(3)]
+
+    def review(self, buyer, rating, service=None):
+        service = service or self.service
+        order = Order.objects.create(buyer=buyer, service=service, status=Order.COMPLETED)
+        return Review.objects.create(buyer=buyer, service=service, order=order, rating=rating, comment='ok')
+
+    def aggregates(self, service=None):
+        service = Service.objects.get(pk=(service or self.service).pk)
+        stars = [getattr(service, f'rating_{star}_count') for star in range(1, 6)]
+        return service.rating_count, service.rating_total, service.rating_avg, stars
+
+    def test_saves_and_deletes_shift_the_aggregates(self):
+        first = self.review(self.buyers[0], 5)
+        self.review(self.buyers[1], 2)
+        self.assertEqual(self.aggregates(), (2, 7, 3.5, [0, 1, 0, 0, 1]))
+
+        first.rating = 4
+        first.save()
+        self.assertEqual(self.aggregates(), (2, 6, 3.0, [0, 1, 0, 1, 0]))
+
+        first.delete()
+        self.assertEqual(self.aggregates(), (1, 2, 2.0, [0, 1, 0, 0, 0]))
+
+    def test_moving_a_review_moves_its_rating(self):
+        review = self.review(self.buyers[0], 3)
+        review.service = self.other
+        review.save()
+        self.assertEqual(self.aggregates(), (0, 0, 0.0, [0, 0, 0, 0, 0]))
+        self.assertEqual(self.aggregates(self.other), (1, 3, 3.0, [0, 0, 1, 0, 0]))
+
+    def test_rebuild_recomputes_drifted_aggregates(self):
+        self.review(self.buyers[0], 4)
+        self.review(self.buyers[1], 1)
+        Service.objects.update(rating_count=9, rating_total=9, rating_avg=1.0, rating_4_count=0)
+
+        call_command('rebuild_rating_aggregates', '--batch-size', '1', stdout=StringIO())
+        self.assertEqual(self.aggregates(), (2, 5, 2.5, [1, 0, 0, 1, 0]))
+        self.assertEqual(self.aggregates(self.other), (0, 0, 0.0, [0, 0, 0, 0, 0]))
@@ -8,6 +8,7 @@ from .models import Review
 from .serializers import ReviewSerializer
 from orders.models import Order
 from services.models import Service
+from api.dynamic_fields import shape_queryset
 
 class ReviewViewSet(viewsets.ModelViewSet):
     serializer_class = ReviewSerializer
@@ -21,12 +22,8 @@ class ReviewViewSet(viewsets.ModelViewSet):
         service_pk = self.kwargs.get('service_pk')
         if not service_pk:
             return Review.objects.none()
-        return (
-            Review.objects
-            .filter(service_id=service_pk)
-            .select_related('buyer', 'service', 'order')
-            .order_by('-created_at')
-        )
+        queryset = Review.objects.filter(service_id=service_pk).order_by('-created_at')
+        return shape_queryset(queryset, self.get_serializer_class(), self.request)
 
     def perform_create(self, serializer):
         service_pk = self.kwargs.get('service_pk')
@@ -0,0 +1,94 @@
+"""Bulk create/update of a seller's services in one transaction.
+
+All items are validated up front against preloaded categories and the
+seller's existing services, then written with ``bulk_create``/``bulk_update``.
+Because bulk writes skip model signals, the category counters, search index
+and response cache are updated here in bulk as well.
+"""
+from collections import Counter
+
+from django.db import transaction
+from rest_framework import serializers
+
+from . import search
+from .cache import invalidate_services
+from .models import Category, Service
+from .serializers import ServiceBulkItemSerializer
+from .signals import adjust_category_count
+
+BULK_MAX_ITEMS = 500
+UPDATABLE_FIELDS = ['title', 'description', 'price', 'category_id', 'delivery_time']
+
+
+def item_id(item):
+    """The item's ``id`` coerced the way ``IntegerField`` does (``"5"`` -> 5), or ``None``."""
+    if not isinstance(item, dict) or item.get('id') is None:
+        return None
+    try:
+        return serializers.IntegerField().to_internal_value(item['id'])
+    except serializers.ValidationError:
+        return None  # reported by the item's serializer
+
+
+def validate_items(seller, items):
+    """Return ``(validated, errors, existing)``; ``errors`` holds ``{'index', 'errors'}`` entries."""
+    ids = [pk for pk in map(item_id, items) if pk is not None]
+    context = {
+        'existing': {service.pk: service for service in Service.objects.filter(seller=seller, pk__in=ids)},
+        'category_ids': set(Category.objects.values_list('pk', flat=True)),
+    }
+    validated, errors = [], []
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            errors.append({'index': index, 'errors': {'non_field_errors': ["Expected an object."]}})
+            continue
+        serializer = ServiceBulkItemSerializer(data=item, partial='id' in item, context=context)
+        if serializer.is_valid():
+            validated.append(serializer.validated_data)
+        else:
+            errors.append({'index': index, 'errors': serializer.errors})
+    return validated, errors, context['existing']
+
+
+def import_services(seller, items):
+    """Validate and write ``items``; returns ``(results, errors)`` and writes nothing on error."""
+    validated, errors, existing = validate_items(seller, items)
+    if errors:
+        return [], errors
+
+    to_create, to_update, results = [], [], []
+    count_deltas = Counter()
+    previous_categories = set()
+    for data in validated:
+        has_category = 'category' in data
+        category_id = data.pop('category', None)
+        service_id = data.pop('id', None)
+        if service_id is None:
+            service = Service(seller=seller, category_id=category_id, **data)
+            to_create.append(service)
+            count_deltas[category_id] += 1
+            results.append(('created', service))
+            continue
+        service = existing[service_id]
+        for field, value in data.items():
+            setattr(service, field, value)
+        if has_category and category_id != service.category_id:
+            previous_categories.add(service.category_id)
+            count_deltas[service.category_id] -= 1
+            count_deltas[category_id] += 1
+            service.category_id = category_id
+        to_update.append(service)
+        results.append(('updated', service))
+
+    with transaction.atomic():
+        Service.objects.bulk_create(to_create, batch_size=BULK_MAX_ITEMS)
+        if to_update:
+            Service.objects.bulk_update(to_update, UPDATABLE_FIELDS, batch_size=BULK_MAX_ITEMS)
+        for category_id, delta in count_deltas.items():
+            if delta:
+                adjust_category_count(category_id, delta)
+        written = to_create + to_update
+        search.index_services(written)
+        invalidate_services([service.pk for service in written], previous_categories)
+
+    return [{'index': index, 'id': service.pk, 'action': action} for index, (action, service) in enumerate(results)], []
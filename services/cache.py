@@ -0,0 +1,159 @@
+"""Versioned response cache for the service catalog.
+
+Cached responses are keyed on the request URL plus the version counters they
+depend on: a service detail on that service's counter, a category-filtered
+list on the category's counter, and any other list on the catalog counter.
+Signals bump the counters after commit, so stale entries are never read again
+and simply age out of the cache backend.
+
+Counters never expire in a shared cache. With the per-process local-memory
+cache a bump only reaches the worker that made it, so counters there expire
+after ``LOCAL_CACHE_TIMEOUT`` and other workers restart them from the clock
+(see ``api.caching``).
+
+Views also key on a state read from the database, so it moves in every
+worker at once: the ``CATALOG_COUNTER`` change counter for lists, and the
+service's own ``table_state`` for a detail. ETags are built from that state
+alone, and a worker whose cache counters lag can never attach a new ETag to an
+old cached body. Each view reads it once per request.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Max
+from django.utils import timezone
+from rest_framework.response import Response
+
+from api.caching import coherent_timeout
+from api.conditional import bump_counter, read_counters
+
+from .models import Service
+
+CATALOG_VERSION_KEY = 'services:version:catalog'
+# Database counter moved by every catalog write, in the writer's transaction.
+CATALOG_COUNTER = 'services:catalog'
+RESPONSE_TIMEOUT = getattr(settings, 'SERVICE_CACHE_TIMEOUT', 300)
+
+
+def service_version_key(service_id):
+    return f'services:version:service:{service_id}'
+
+
+def category_version_key(category_id):
+    return f'services:version:category:{category_id}'
+
+
+def get_versions(*keys):
+    versions = cache.get_many(keys)
+    missing = {key: time.time_ns() for key in keys if key not in versions}
+    if missing:
+        # Start unseen counters from the clock so an evicted counter can never
+        # come back at a value an older cached response was stored under.
+        for key, value in missing.items():
+            cache.add(key, value, coherent_timeout(None))
+        versions.update(cache.get_many(list(missing)))
+    return [versions.get(key, missing.get(key)) for key in keys]
+
+
+def bump_versions(*keys):
+    for key in keys:
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), coherent_timeout(None))
+
+
+def table_state(queryset):
+    """``[row count, newest updated_at]`` of ``queryset``: one aggregate that every write moves."""
+    state = queryset.order_by().aggregate(count=Count('pk'), updated=Max('updated_at'))
+    return [state['count'], state['updated']]
+
+
+def touch_services(service_ids):
+    """Move ``updated_at`` for writes that do not go through ``Service.save()``."""
+    Service.objects.filter(pk__in=service_ids).update(updated_at=timezone.now())
+
+
+def catalog_state():
+    return read_counters(CATALOG_COUNTER)
+
+
+def invalidate_service(service_id, *category_ids):
+    bump_counter(CATALOG_COUNTER)
+    keys = [CATALOG_VERSION_KEY, service_version_key(service_id)]
+    keys += [category_version_key(category_id) for category_id in set(category_ids) if category_id]
+    transaction.on_commit(lambda: bump_versions(*keys))
+
+
+def invalidate_services(service_ids, previous_category_ids=()):
+    """Invalidate services changed through ``update()``/``bulk_*``, where no signals fire."""
+    touch_services(service_ids)
+    bump_counter(CATALOG_COUNTER)
+    rows = Service.objects.filter(pk__in=service_ids).values_list('pk', 'category_id')
+    keys = [CATALOG_VERSION_KEY]
+    keys += [category_version_key(category_id) for category_id in previous_category_ids if category_id]
+    for service_id, category_id in rows:
+        keys.append(service_version_key(service_id))
+        if category_id:
+            keys.append(category_version_key(category_id))
+    transaction.on_commit(lambda: bump_versions(*set(keys)))
+
+
+def invalidate_category(category_id):
+    bump_counter(CATALOG_COUNTER)
+    keys = [CATALOG_VERSION_KEY, category_version_key(category_id)]
+    transaction.on_commit(lambda: bump_versions(*keys))
+
+
+def response_cache_key(request, scope, version_keys, state=()):
+    parts = [request.build_absolute_uri(), *get_versions(*version_keys), *state]
+    digest = hashlib.sha1(repr(parts).encode()).hexdigest()
+    return f"services:response:{scope}:{digest}"
+
+
+class VersionedResponseCacheMixin:
+    """Serve ``list``/``retrieve`` from the cache until a relevant counter moves."""
+    cache_timeout = RESPONSE_TIMEOUT
+    # Read once per request and shared by the ETag and the cache key; views are per request.
+    _list_state = None
+    _detail_state = None
+
+    def get_list_version_keys(self, request):
+        category = request.query_params.get('category')
+        if category and category.isdigit():
+            return [category_version_key(int(category))]
+        return [CATALOG_VERSION_KEY]
+
+    def get_detail_version_keys(self, request):
+        return [service_version_key(self.kwargs[self.lookup_url_kwarg or self.lookup_field])]
+
+    def get_list_state(self, request):
+        if self._list_state is None:
+            self._list_state = catalog_state()
+        return self._list_state
+
+    def get_detail_state(self, request):
+        if self._detail_state is None:
+            pk = self.kwargs[self.lookup_url_kwarg or self.lookup_field]
+            self._detail_state = table_state(Service.objects.filter(pk=pk))
+        return self._detail_state
+
+    def cached_response(self, key, build):
+        data = cache.get(key)
+        if data is not None:
+            return Response(data)
+        response = build()
+        if response.status_code == 200:
+            cache.set(key, response.data, self.cache_timeout)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        key = response_cache_key(request, 'list', self.get_list_version_keys(request), self.get_list_state(request))
+        return self.cached_response(key, lambda: super(VersionedResponseCacheMixin, self).list(request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        key = response_cache_key(request, 'detail', self.get_detail_version_keys(request), self.get_detail_state(request))
+        return self.cached_response(key, lambda: super(VersionedResponseCacheMixin, self).retrieve(request, *args, **kwargs))
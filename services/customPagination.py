@@ -1,6 +1,147 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
 from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPageNumberPagination(PageNumberPagination):
+    """Page-number pagination with an opt-in keyset (cursor) mode.
+
+    Clients opt in with ``?pagination=cursor`` (the ``next``/``previous`` links
+    then carry ``?cursor=``). Pages are ordered on ``(key, id)`` where ``key``
+    is the leading ``?ordering=`` field if the view lists it in
+    ``keyset_fields``, otherwise the view's ``keyset_ordering``. ``key`` may
+    also be an annotation such as ``search_rank``; models without the key
+    field are paged on ``id`` alone. Each page is a single indexed range
+    query, with no ``COUNT(*)`` and no ``OFFSET``.
+    """
+    cursor_query_param = 'cursor'
+    pagination_mode_query_param = 'pagination'
+    default_keyset_fields = ('created_at',)
+    default_keyset_ordering = '-created_at'
+    invalid_cursor_message = 'Invalid cursor.'
+
+    def use_cursor(self, request):
+        return (
+            self.cursor_query_param in request.query_params
+            or request.query_params.get(self.pagination_mode_query_param) == 'cursor'
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_mode = self.use_cursor(request)
+        if not self.cursor_mode:
+            return super().paginate_queryset(queryset, request, view)
+
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        self.request = request
+        self.key, self.descending = self.get_keyset_ordering(queryset, view)
+        field = self.get_key_field(queryset)
+        if field is None:
+            self.key, field = 'id', queryset.model._meta.pk
+        cursor = self.decode_cursor(request, field)
+
+        reverse = cursor['r'] if cursor else False
+        descending = self.descending != reverse
+        prefix = '-' if descending else ''
+        queryset = queryset.order_by(*dict.fromkeys([f'{prefix}{self.key}', f'{prefix}id']))
+
+        if cursor:
+            lookup = 'lt' if descending else 'gt'
+            queryset = queryset.filter(
+                Q(**{f'{self.key}__{lookup}': cursor['v']})
+                | Q(**{self.key: cursor['v'], f'id__{lookup}': cursor['id']})
+            )
+
+        results = list(queryset[:page_size + 1])
+        has_more = len(results) > page_size
+        results = results[:page_size]
+        if reverse:
+            results.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, cursor is not None
+
+        self.page_results = results
+        return results
+
+    def get_keyset_ordering(self, queryset, view):
+        allowed = getattr(view, 'keyset_fields', self.default_keyset_fields)
+        order_by = queryset.query.order_by
+        if order_by and isinstance(order_by[0], str) and order_by[0].lstrip('-') in allowed:
+            return order_by[0].lstrip('-'), order_by[0].startswith('-')
+        ordering = getattr(view, 'keyset_ordering', self.default_keyset_ordering)
+        return ordering.lstrip('-'), ordering.startswith('-')
+
+    def get_key_field(self, queryset):
+        """The model field or annotation output field for ``self.key``, or ``None`` if there is none."""
+        annotation = queryset.query.annotations.get(self.key)
+        if annotation is not None:
+            return annotation.output_field
+        try:
+            return queryset.model._meta.get_field(self.key)
+        except FieldDoesNotExist:
+            return None
+
+    def encode_cursor(self, item, reverse):
+        value = self.field_value(item)
+        payload = json.dumps({'v': value, 'id': item.pk, 'r': reverse}, separators=(',', ':'))
+        encoded = urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+        url = remove_query_param(self.request.build_absolute_uri(), self.page_query_param)
+        return replace_query_param(url, self.cursor_query_param, encoded)
+
+    def field_value(self, item):
+        value = getattr(item, self.key)
+        if hasattr(value, 'isoformat'):
+            return value.isoformat()
+        return str(value)
+
+    def decode_cursor(self, request, field):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            payload = json.loads(urlsafe_b64decode(encoded + '=' * (-len(encoded) % 4)))
+            return {
+                'v': field.to_python(payload['v']),
+                'id': int(payload['id']),
+                'r': bool(payload.get('r', False)),
+            }
+        except (TypeError, ValueError, KeyError, ValidationError, FieldDoesNotExist):
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_next_link(self):
+        if not self.cursor_mode:
+            return super().get_next_link()
+        if not self.has_next or not self.page_results:
+            return None
+        return self.encode_cursor(self.page_results[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.cursor_mode:
+            return super().get_previous_link()
+        if not self.has_previous or not self.page_results:
+            return None
+        return self.encode_cursor(self.page_results[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        if not self.cursor_mode:
+            return super().get_paginated_response(data)
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
 
-class CustomPagination(PageNumberPagination):
+class CustomPagination(KeysetPageNumberPagination):
     page_size = 10
     page_size_query_param = 'page_size'
-    max_page_size = 100
\ No newline at end of file
+    max_page_size = 100
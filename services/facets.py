@@ -0,0 +1,83 @@
+"""Sidebar facets for the service list, computed in a single aggregate query."""
+from django.db.models import Count, Q
+from rest_framework.response import Response
+
+PRICE_BUCKETS = [0, 25, 50, 100, 250, 500, 1000]
+DELIVERY_TIME_BUCKETS = [1, 3, 7, 14, 30]
+
+
+def bucket_ranges(bounds):
+    """``[0, 25, 50]`` -> ``[('0-25', 0, 25), ('25-50', 25, 50), ('50+', 50, None)]``."""
+    ranges = [(f'{low}-{high}', low, high) for low, high in zip(bounds, bounds[1:])]
+    ranges.append((f'{bounds[-1]}+', bounds[-1], None))
+    return ranges
+
+
+def bucket_aggregates(prefix, field, bounds):
+    aggregates = {}
+    for index, (_, low, high) in enumerate(bucket_ranges(bounds)):
+        condition = Q(**{f'{field}__gte': low})
+        if high is not None:
+            condition &= Q(**{f'{field}__lt': high})
+        aggregates[f'{prefix}_{index}'] = Count('id', filter=condition)
+    return aggregates
+
+
+def compute_facets(queryset):
+    """Per-category counts plus price and delivery-time buckets for ``queryset``.
+
+    Rows are grouped by category with the bucket counts as conditional
+    aggregates, so the whole sidebar costs one query.
+    """
+    price_aggregates = bucket_aggregates('price', 'price', PRICE_BUCKETS)
+    delivery_aggregates = bucket_aggregates('delivery', 'delivery_time', DELIVERY_TIME_BUCKETS)
+    rows = (
+        queryset.order_by()
+        .values('category_id', 'category__name')
+        .annotate(count=Count('id'), **price_aggregates, **delivery_aggregates)
+    )
+
+    categories = []
+    price_counts = dict.fromkeys(price_aggregates, 0)
+    delivery_counts = dict.fromkeys(delivery_aggregates, 0)
+    for row in rows:
+        categories.append({'id': row['category_id'], 'name': row['category__name'], 'count': row['count']})
+        for key in price_counts:
+            price_counts[key] += row[key]
+        for key in delivery_counts:
+            delivery_counts[key] += row[key]
+
+    def buckets(prefix, bounds, counts):
+        return [
+            {'label': label, 'min': low, 'max': high, 'count': counts[f'{prefix}_{index}']}
+            for index, (label, low, high) in enumerate(bucket_ranges(bounds))
+        ]
+
+    categories.sort(key=lambda category: -category['count'])
+    return {
+        'categories': categories,
+        'price': buckets('price', PRICE_BUCKETS, price_counts),
+        'delivery_time': buckets('delivery', DELIVERY_TIME_BUCKETS, delivery_counts),
+    }
+
+
+class FacetedListMixin:
+    """Add a ``facets`` block to the list response when ``?facets=true`` is passed."""
+    facets_query_param = 'facets'
+
+    def wants_facets(self, request):
+        return request.query_params.get(self.facets_query_param, '').lower() in ('1', 'true', 'yes')
+
+    def list(self, request, *args, **kwargs):
+        if not self.wants_facets(request):
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        facets = compute_facets(queryset)
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            response = self.get_paginated_response(self.get_serializer(page, many=True).data)
+        else:
+            response = Response({'results': self.get_serializer(queryset, many=True).data})
+        response.data['facets'] = facets
+        return response
@@ -0,0 +1,25 @@
+from rest_framework import filters
+from .search import search_services
+
+
+class ServiceSearchFilter(filters.SearchFilter):
+    """Ranked full-text search on ``?search=`` (see services.search).
+
+    Results are ordered by relevance unless the client asked for an explicit
+    ``?ordering=``, in which case that ordering is kept. When the fallback
+    index kept only its best matches, ``request.search_limit`` says how many.
+    """
+    search_description = (
+        'Full-text search over title and description, ranked by relevance. Without PostgreSQL only '
+        'the best matches are kept, and the response then says how many in `search_limit`.'
+    )
+
+    def filter_queryset(self, request, queryset, view):
+        text = request.query_params.get(self.search_param, '').strip()
+        if not text:
+            return queryset
+        order_by_rank = not request.query_params.get(filters.OrderingFilter.ordering_param)
+        queryset, limit = search_services(queryset, text, order_by_rank=order_by_rank)
+        if limit is not None:
+            request.search_limit = limit
+        return queryset
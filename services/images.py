@@ -0,0 +1,135 @@
+"""Off-request processing of uploaded service images.
+
+Uploads are spooled to local disk inside the request and the row is saved as
+``pending``. After commit the spooled file goes to a process pool that renders
+the variants with Pillow; a small thread pool then pushes the results to
+``SERVICE_IMAGE_STORAGE`` and marks the image ``ready`` (or ``failed``).
+Set ``SERVICE_IMAGE_PROCESSING = 'sync'`` to do all of it inline, e.g. in
+tests together with a ``FileSystemStorage``.
+"""
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.db import close_old_connections, transaction
+from django.utils.module_loading import import_string
+
+from .imaging import render_variants
+from .models import ServiceImage
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_render_pool = None
+_publish_pool = None
+
+
+def spool_storage():
+    return FileSystemStorage(location=settings.SERVICE_IMAGE_SPOOL_ROOT)
+
+
+def output_storage():
+    return import_string(settings.SERVICE_IMAGE_STORAGE)()
+
+
+def spool_upload(upload):
+    """Write the uploaded file to the local spool and return its spool name."""
+    return spool_storage().save(f'uploads/{upload.name}', upload)
+
+
+def _pools():
+    global _render_pool, _publish_pool
+    with _lock:
+        if _render_pool is None:
+            _render_pool = ProcessPoolExecutor(
+                max_workers=settings.SERVICE_IMAGE_WORKERS,
+                mp_context=multiprocessing.get_context('spawn'),
+            )
+            _publish_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix='service-image-publish')
+    return _render_pool, _publish_pool
+
+
+def schedule(image):
+    """Queue ``image`` for processing once the current transaction commits."""
+    image_id = image.pk
+    transaction.on_commit(lambda: _submit(image_id))
+
+
+def _submit(image_id):
+    if settings.SERVICE_IMAGE_PROCESSING == 'sync':
+        process(image_id)
+        return
+    image = ServiceImage.objects.filter(pk=image_id).only('source').first()
+    if image is None:
+        return
+    ServiceImage.objects.filter(pk=image_id).update(status=ServiceImage.PROCESSING)
+    render_pool, publish_pool = _pools()
+    storage = spool_storage()
+    future = render_pool.submit(render_variants, storage.path(image.source), storage.path(f'variants/{image_id}'))
+    future.add_done_callback(lambda done: publish_pool.submit(_publish_result, image_id, done))
+
+
+def _publish_result(image_id, future):
+    close_old_connections()
+    try:
+        error = future.exception()
+        if error is not None:
+            _mark_failed(image_id, error)
+        else:
+            publish(image_id, future.result())
+    finally:
+        close_old_connections()
+
+
+def process(image_id):
+    """Render and publish one image in the current process."""
+    image = ServiceImage.objects.get(pk=image_id)
+    storage = spool_storage()
+    try:
+        paths = render_variants(storage.path(image.source), storage.path(f'variants/{image_id}'))
+    except Exception as exc:
+        _mark_failed(image_id, exc)
+        return
+    publish(image_id, paths)
+
+
+def publish(image_id, paths):
+    image = ServiceImage.objects.filter(pk=image_id).first()
+    if image is None:
+        _cleanup(None, paths)
+        return
+    storage = output_storage()
+    try:
+        variants = {}
+        for name, path in paths.items():
+            with open(path, 'rb') as handle:
+                stored = storage.save(f'service_images/{image.service_id}/{image_id}-{name}.jpg', File(handle))
+            variants[name] = storage.url(stored)
+    except Exception as exc:
+        _mark_failed(image_id, exc)
+        return
+    _cleanup(image.source, paths)
+    image.variants = variants
+    image.status = ServiceImage.READY
+    image.source = ''
+    image.error = ''
+    image.save(update_fields=['variants', 'status', 'source', 'error'])
+
+
+def _mark_failed(image_id, error):
+    logger.error("Processing service image %s failed: %s", image_id, error)
+    ServiceImage.objects.filter(pk=image_id).update(status=ServiceImage.FAILED, error=str(error)[:255])
+
+
+def _cleanup(source, paths):
+    storage = spool_storage()
+    if source:
+        storage.delete(source)
+    for path in paths.values():
+        if os.path.exists(path):
+            os.remove(path)
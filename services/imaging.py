@@ -0,0 +1,32 @@
+"""Pillow work for service image variants.
+
+Kept free of Django imports so it can run in a spawned worker process.
+"""
+import os
+
+from PIL import Image, ImageOps
+
+VARIANT_SIZES = {
+    'large': (1200, 1200),
+    'medium': (600, 600),
+    'thumbnail': (200, 200),
+}
+
+
+def render_variants(source_path, output_dir, sizes=None):
+    """Write a JPEG per variant into ``output_dir`` and return ``{variant: path}``."""
+    sizes = sizes or VARIANT_SIZES
+    os.makedirs(output_dir, exist_ok=True)
+    base = os.path.splitext(os.path.basename(source_path))[0]
+    paths = {}
+    with Image.open(source_path) as original:
+        original = ImageOps.exif_transpose(original)
+        if original.mode not in ('RGB', 'L'):
+            original = original.convert('RGB')
+        for name, size in sizes.items():
+            variant = original.copy()
+            variant.thumbnail(size, Image.LANCZOS)
+            path = os.path.join(output_dir, f'{base}-{name}.jpg')
+            variant.save(path, 'JPEG', quality=85, optimize=True, progressive=True)
+            paths[name] = path
+    return paths
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from services import images
+from services.models import ServiceImage
+
+
+class Command(BaseCommand):
+    help = "Process spooled service images left pending or processing, e.g. after a worker restart."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--include-failed', action='store_true', help="Retry failed images as well.")
+
+    def handle(self, *args, **options):
+        statuses = [ServiceImage.PENDING, ServiceImage.PROCESSING]
+        if options['include_failed']:
+            statuses.append(ServiceImage.FAILED)
+        image_ids = ServiceImage.objects.filter(status__in=statuses).exclude(source='').values_list('pk', flat=True)
+        count = 0
+        for image_id in image_ids.iterator():
+            images.process(image_id)
+            count += 1
+        self.stdout.write(self.style.SUCCESS(f"Processed {count} images."))
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from services import search
+
+
+class Command(BaseCommand):
+    help = "Recompute the full-text search vector (or in-process index) for every service."
+
+    def handle(self, *args, **options):
+        count = search.rebuild_index()
+        self.stdout.write(self.style.SUCCESS(f"Indexed {count} services."))
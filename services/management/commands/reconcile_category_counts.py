@@ -0,0 +1,23 @@
+from django.db.models import Count, F
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from services.models import Category
+from services.cache import invalidate_category
+
+
+class Command(BaseCommand):
+    help = "Recount services per category and fix any drift in Category.service_count."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="Report drift without fixing it.")
+
+    def handle(self, *args, **options):
+        drifted = Category.objects.annotate(actual=Count('service')).exclude(service_count=F('actual'))
+        fixed = 0
+        for category in drifted:
+            self.stdout.write(f"{category.name}: stored {category.service_count}, actual {category.actual}")
+            if not options['dry_run']:
+                Category.objects.filter(pk=category.pk).update(service_count=category.actual, updated_at=timezone.now())
+                invalidate_category(category.pk)
+                fixed += 1
+        self.stdout.write(self.style.SUCCESS(f"Fixed {fixed} categories."))
@@ -0,0 +1,26 @@
+# Generated by Django 5.1.7 on 2026-10-18 17:21
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_service_counts(apps, schema_editor):
+    Category = apps.get_model('services', 'Category')
+    for category in Category.objects.annotate(actual=Count('service')):
+        Category.objects.filter(pk=category.pk).update(service_count=category.actual)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0003_service_rating_aggregates'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='service_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_service_counts, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,6 @@
 from django.db import models
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.search import SearchVectorField
 from cloudinary.models import CloudinaryField
 from .validators import validate_file_size
 
@@ -8,6 +9,9 @@ User = get_user_model()
 class Category(models.Model):
     name = models.CharField(max_length=100, unique=True)
     description = models.TextField(null=True, blank=True)  
+    # Maintained by services.signals; see the reconcile_category_counts command.
+    service_count = models.PositiveIntegerField(default=0, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.name
@@ -21,11 +25,61 @@ class Service(models.Model):
     category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True, blank=True)
     delivery_time = models.PositiveIntegerField(help_text="Delivery time in days")
     created_at = models.DateTimeField(auto_now_add=True)
+    # Also moved by services.cache for writes that bypass save(); feeds the list/detail ETags.
+    updated_at = models.DateTimeField(auto_now=True)
+    # Review aggregates, maintained by reviews.aggregates.
+    rating_avg = models.FloatField(default=0)
+    rating_count = models.PositiveIntegerField(default=0)
+    rating_total = models.PositiveIntegerField(default=0)
+    rating_1_count = models.PositiveIntegerField(default=0)
+    rating_2_count = models.PositiveIntegerField(default=0)
+    rating_3_count = models.PositiveIntegerField(default=0)
+    rating_4_count = models.PositiveIntegerField(default=0)
+    rating_5_count = models.PositiveIntegerField(default=0)
+    # Maintained by services.search; GIN-indexed on PostgreSQL only.
+    search_vector = SearchVectorField(null=True, blank=True, editable=False)
+
+    class Meta:
+        # seller is already covered by the ForeignKey's own index.
+        indexes = [
+            models.Index(fields=['category', 'price'], name='service_category_price_idx'),
+        ]
 
     def __str__(self):
         return self.title
 
+    @property
+    def rating_histogram(self):
+        return {star: getattr(self, f'rating_{star}_count') for star in range(1, 6)}
+
 
 class ServiceImage(models.Model):
+    PENDING = 'pending'
+    PROCESSING = 'processing'
+    READY = 'ready'
+    FAILED = 'failed'
+
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (PROCESSING, 'Processing'),
+        (READY, 'Ready'),
+        (FAILED, 'Failed'),
+    ]
+
     service = models.ForeignKey(Service, on_delete=models.CASCADE, related_name='images')
-    image = CloudinaryField('image')
+    # Legacy direct uploads; new uploads go through services.images into ``variants``.
+    image = CloudinaryField('image', blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=READY)
+    variants = models.JSONField(default=dict, blank=True)
+    source = models.CharField(max_length=255, blank=True, editable=False)
+    error = models.CharField(max_length=255, blank=True, editable=False)
+
+    @property
+    def url(self):
+        if self.variants:
+            return self.variants.get('large') or next(iter(self.variants.values()))
+        return self.image.url if self.image else None
+
+    @property
+    def thumbnail_url(self):
+        return self.variants.get('thumbnail') or self.url
@@ -0,0 +1,236 @@
+"""Ranked full-text search over the service catalog.
+
+On PostgreSQL services carry a weighted ``search_vector`` (title weighted above
+description) that is refreshed from signals and served by a GIN index. Other
+databases use an in-process inverted index with the same weighting and the
+same prefix match on the last term, so results rank the same way on SQLite.
+
+The fallback hands its ranking to the database as a ``CASE`` over the matched
+ids, so it keeps only the ``FALLBACK_LIMIT`` best matches; ``search_services``
+reports when it did, and the list response carries ``search_limit`` then. It
+is meant for development databases; PostgreSQL has no such cap.
+"""
+import math
+import re
+import threading
+from bisect import bisect_left
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connection
+from django.db.models import Case, F, FloatField, Value, When
+
+from .models import Service
+
+SEARCH_CONFIG = 'english'
+TITLE_WEIGHT = 1.0
+DESCRIPTION_WEIGHT = 0.4
+FALLBACK_LIMIT = 1000
+
+STOP_WORDS = {
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'in',
+    'is', 'it', 'of', 'on', 'or', 'that', 'the', 'to', 'with',
+}
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def service_search_vector():
+    return (
+        SearchVector('title', weight='A', config=SEARCH_CONFIG)
+        + SearchVector('description', weight='B', config=SEARCH_CONFIG)
+    )
+
+
+def tokenize(text):
+    return [t for t in TOKEN_RE.findall((text or '').lower()) if t not in STOP_WORDS]
+
+
+def uses_postgres():
+    return connection.vendor == 'postgresql'
+
+
+class InvertedIndex:
+    """Token -> {service_id: weight} postings, built lazily from the database."""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._postings = {}
+        self._documents = {}
+        self._vocabulary = []
+        self._vocabulary_dirty = False
+        self._loaded = False
+
+    def clear(self):
+        with self._lock:
+            self._postings.clear()
+            self._documents.clear()
+            self._vocabulary = []
+            self._loaded = False
+
+    def rebuild(self):
+        self.clear()
+        self._ensure_loaded()
+        return len(self._documents)
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            rows = Service.objects.values_list('id', 'title', 'description').iterator(chunk_size=2000)
+            for service_id, title, description in rows:
+                self._add(service_id, title, description)
+            self._loaded = True
+
+    def _add(self, service_id, title, description):
+        self._remove(service_id)
+        weights = {}
+        for token in tokenize(title):
+            weights[token] = weights.get(token, 0.0) + TITLE_WEIGHT
+        for token in tokenize(description):
+            weights[token] = weights.get(token, 0.0) + DESCRIPTION_WEIGHT
+        for token, weight in weights.items():
+            if token not in self._postings:
+                self._postings[token] = {}
+                self._vocabulary_dirty = True
+            self._postings[token][service_id] = weight
+        self._documents[service_id] = tuple(weights)
+
+    def _remove(self, service_id):
+        for token in self._documents.pop(service_id, ()):
+            postings = self._postings.get(token)
+            if postings is None:
+                continue
+            postings.pop(service_id, None)
+            if not postings:
+                del self._postings[token]
+                self._vocabulary_dirty = True
+
+    def add(self, service_id, title, description):
+        with self._lock:
+            if self._loaded:
+                self._add(service_id, title, description)
+
+    def remove(self, service_id):
+        with self._lock:
+            if self._loaded:
+                self._remove(service_id)
+
+    def _expand_prefix(self, prefix):
+        if self._vocabulary_dirty:
+            self._vocabulary = sorted(self._postings)
+            self._vocabulary_dirty = False
+        start = bisect_left(self._vocabulary, prefix)
+        matches = []
+        for token in self._vocabulary[start:]:
+            if not token.startswith(prefix):
+                break
+            matches.append(token)
+        return matches
+
+    def search(self, text, limit=None):
+        """Return ``[(service_id, score), ...]``, best first, for services matching every term."""
+        terms = tokenize(text)
+        if not terms:
+            return []
+        self._ensure_loaded()
+        with self._lock:
+            total = len(self._documents) or 1
+            scores = None
+            for position, term in enumerate(terms):
+                # The last term is matched as a prefix so results follow the user's typing.
+                if position == len(terms) - 1:
+                    tokens = self._expand_prefix(term)
+                else:
+                    tokens = [term] if term in self._postings else []
+                term_scores = {}
+                for token in tokens:
+                    postings = self._postings[token]
+                    idf = math.log(1 + total / len(postings))
+                    for service_id, weight in postings.items():
+                        term_scores[service_id] = max(term_scores.get(service_id, 0.0), weight * idf)
+                if scores is None:
+                    scores = term_scores
+                else:
+                    scores = {
+                        service_id: score + term_scores[service_id]
+                        for service_id, score in scores.items()
+                        if service_id in term_scores
+                    }
+                if not scores:
+                    return []
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], -item[0]))
+        return ranked[:limit] if limit is not None else ranked
+
+
+fallback_index = InvertedIndex()
+
+
+def build_query(text):
+    terms = tokenize(text)
+    if not terms:
+        return None
+    terms[-1] = f"{terms[-1]}:*"
+    return SearchQuery(' & '.join(terms), config=SEARCH_CONFIG, search_type='raw')
+
+
+def search_services(queryset, text, order_by_rank=True):
+    """Filter ``queryset`` down to services matching ``text``, annotated with ``search_rank``.
+
+    Returns ``(queryset, limit)``; ``limit`` is ``FALLBACK_LIMIT`` when the
+    fallback index matched more services than that and only the best were
+    kept, otherwise ``None``.
+    """
+    limit = None
+    if not tokenize(text):
+        return queryset, limit
+    if uses_postgres():
+        query = build_query(text)
+        queryset = queryset.filter(search_vector=query).annotate(
+            search_rank=SearchRank(F('search_vector'), query)
+        )
+    else:
+        ranked = fallback_index.search(text, limit=FALLBACK_LIMIT + 1)
+        if not ranked:
+            return queryset.none(), limit
+        if len(ranked) > FALLBACK_LIMIT:
+            limit, ranked = FALLBACK_LIMIT, ranked[:FALLBACK_LIMIT]
+        queryset = queryset.filter(pk__in=[service_id for service_id, _ in ranked]).annotate(
+            search_rank=Case(
+                *[When(pk=service_id, then=Value(score)) for service_id, score in ranked],
+                default=Value(0.0),
+                output_field=FloatField(),
+            )
+        )
+    if order_by_rank:
+        queryset = queryset.order_by('-search_rank', '-created_at', '-id')
+    return queryset, limit
+
+
+def index_service(service):
+    if uses_postgres():
+        Service.objects.filter(pk=service.pk).update(search_vector=service_search_vector())
+    else:
+        fallback_index.add(service.pk, service.title, service.description)
+
+
+def index_services(services):
+    if uses_postgres():
+        Service.objects.filter(pk__in=[service.pk for service in services]).update(
+            search_vector=service_search_vector()
+        )
+    else:
+        for service in services:
+            fallback_index.add(service.pk, service.title, service.description)
+
+
+def unindex_service(service_id):
+    if not uses_postgres():
+        fallback_index.remove(service_id)
+
+
+def rebuild_index():
+    if uses_postgres():
+        return Service.objects.update(search_vector=service_search_vector())
+    return fallback_index.rebuild()
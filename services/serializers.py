@@ -1,6 +1,8 @@
 from rest_framework import serializers
 from .models import Service, Category, ServiceImage
 from users.serializers import UserSerializer, User
+from .validators import validate_file_size
+from api.dynamic_fields import DynamicFieldsMixin
 
 
 class CategorySerializer(serializers.ModelSerializer):
@@ -11,10 +13,17 @@ class CategorySerializer(serializers.ModelSerializer):
         fields = ['id', 'name','description', 'service_count']
 
 class ServiceImageSerializer(serializers.ModelSerializer):
-    image = serializers.ImageField()
+    image = serializers.ImageField(write_only=True, validators=[validate_file_size])
+
     class Meta:
         model = ServiceImage
-        fields = ['id', 'image']
+        fields = ['id', 'image', 'status', 'variants']
+        read_only_fields = ['status', 'variants']
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        data['image'] = instance.url
+        return data
 
 # class ServiceSerializer(serializers.ModelSerializer):
 #     images = ServiceImageSerializer(many=True, read_only=True)
@@ -25,6 +34,26 @@ class ServiceImageSerializer(serializers.ModelSerializer):
 #         # fields = '__all__'
 
 
+class ServiceBulkItemSerializer(serializers.ModelSerializer):
+    """One entry of a bulk import; ``id`` marks an update of the seller's own service."""
+    id = serializers.IntegerField(required=False)
+    category = serializers.IntegerField(required=False, allow_null=True)
+
+    class Meta:
+        model = Service
+        fields = ['id', 'title', 'description', 'price', 'category', 'delivery_time']
+
+    def validate_id(self, value):
+        if value not in self.context['existing']:
+            raise serializers.ValidationError("Service not found.")
+        return value
+
+    def validate_category(self, value):
+        if value is not None and value not in self.context['category_ids']:
+            raise serializers.ValidationError("Invalid category.")
+        return value
+
+
 class SellerShortSerializer(serializers.ModelSerializer):
     full_name = serializers.SerializerMethodField()
 
@@ -36,10 +65,35 @@ class SellerShortSerializer(serializers.ModelSerializer):
         return f"{obj.first_name} {obj.last_name}"
 
 
-class ServiceSerializer(serializers.ModelSerializer):
+class ServiceSummarySerializer(serializers.ModelSerializer):
+    """Just enough of a service to label a row; expects ready images prefetched."""
+    thumbnail = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Service
+        fields = ['id', 'title', 'price', 'thumbnail']
+
+    def get_thumbnail(self, obj):
+        for image in obj.images.all():
+            if image.status == ServiceImage.READY:
+                return image.thumbnail_url
+        return None
+
+
+class ServiceSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     images = ServiceImageSerializer(many=True, read_only=True)
     seller = SellerShortSerializer(read_only=True)
+    rating_histogram = serializers.DictField(child=serializers.IntegerField(), read_only=True)
+
+    expandable_fields = {
+        'images': {'many': True},
+        'seller': {'serializer': SellerShortSerializer},
+    }
 
     class Meta:
         model = Service
-        fields = ['id', 'title', 'description', 'price', 'category', 'delivery_time', 'created_at', 'images', 'seller']
+        fields = [
+            'id', 'title', 'description', 'price', 'category', 'delivery_time', 'created_at', 'images', 'seller',
+            'rating_avg', 'rating_count', 'rating_histogram',
+        ]
+        read_only_fields = ['rating_avg', 'rating_count']
@@ -0,0 +1,70 @@
+from django.db.models import F
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+from .models import Service, ServiceImage, Category
+from . import search, cache
+
+
+@receiver(pre_save, sender=Service)
+def remember_previous_category(sender, instance, **kwargs):
+    instance._previous_category_id = None
+    if instance.pk is not None:
+        instance._previous_category_id = (
+            Service.objects.filter(pk=instance.pk).values_list('category_id', flat=True).first()
+        )
+
+
+def adjust_category_count(category_id, delta):
+    if category_id:
+        Category.objects.filter(pk=category_id).update(
+            service_count=F('service_count') + delta, updated_at=timezone.now()
+        )
+
+
+@receiver(post_save, sender=Service)
+def update_category_count_on_save(sender, instance, created, **kwargs):
+    previous_category_id = getattr(instance, '_previous_category_id', None)
+    if created:
+        adjust_category_count(instance.category_id, 1)
+    elif previous_category_id != instance.category_id:
+        adjust_category_count(previous_category_id, -1)
+        adjust_category_count(instance.category_id, 1)
+
+
+@receiver(post_delete, sender=Service)
+def update_category_count_on_delete(sender, instance, **kwargs):
+    adjust_category_count(instance.category_id, -1)
+
+
+@receiver(post_save, sender=Service)
+def index_service_for_search(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and not {'title', 'description'} & set(update_fields):
+        return
+    search.index_service(instance)
+
+
+@receiver(post_delete, sender=Service)
+def unindex_service_for_search(sender, instance, **kwargs):
+    search.unindex_service(instance.pk)
+
+
+@receiver(post_save, sender=Service)
+@receiver(post_delete, sender=Service)
+def invalidate_service_cache(sender, instance, **kwargs):
+    previous_category_id = getattr(instance, '_previous_category_id', None)
+    cache.invalidate_service(instance.pk, instance.category_id, previous_category_id)
+
+
+@receiver(post_save, sender=ServiceImage)
+@receiver(post_delete, sender=ServiceImage)
+def invalidate_service_image_cache(sender, instance, **kwargs):
+    category_id = Service.objects.filter(pk=instance.service_id).values_list('category_id', flat=True).first()
+    cache.touch_services([instance.service_id])
+    cache.invalidate_service(instance.service_id, category_id)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_category_cache(sender, instance, **kwargs):
+    cache.invalidate_category(instance.pk)
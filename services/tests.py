@@ -1,3 +1,303 @@
-from django.test import TestCase
+import os
+import shutil
+import tempfile
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+from io import BytesIO, StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from PIL import Image
+from rest_framework.test import APIClient
+
+from api.testing import as_worker, make_service, make_user, seconds_later
+from . import images, search
+from .cache import CATALOG_VERSION_KEY, bump_versions, get_versions, invalidate_services
+from .facets import compute_facets
+from .models import Category, Service, ServiceImage
+
+
+class VersionCounterTests(SimpleTestCase):
+    def test_bump_in_another_worker_is_seen_through_a_shared_cache(self):
+        shared = {'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': tempfile.mkdtemp(),
+        }}
+        with override_settings(CACHES=shared):
+            before = get_versions(CATALOG_VERSION_KEY)
+        with override_settings(CACHES=shared):
+            bump_versions(CATALOG_VERSION_KEY)
+        with override_settings(CACHES=shared):
+            self.assertNotEqual(get_versions(CATALOG_VERSION_KEY), before)
+
+    @override_settings(LOCAL_CACHE_TIMEOUT=5)
+    def test_bump_in_another_worker_is_seen_after_the_local_timeout(self):
+        with as_worker('a'):
+            before = get_versions(CATALOG_VERSION_KEY)
+        with as_worker('b'):
+            bump_versions(CATALOG_VERSION_KEY)
+        with as_worker('a'):
+            with seconds_later(6):
+                self.assertNotEqual(get_versions(CATALOG_VERSION_KEY), before)
+
+
+class CategoryCountTests(TestCase):
+    def setUp(self):
+        self.seller = make_user('seller', 'seller')
+        self.design = Category.objects.create(name='Design')
+        self.writing = Category.objects.create(name='Writing')
+
+    def counts(self):
+        return list(Category.objects.order_by('name').values_list('service_count', flat=True))
+
+    def test_count_follows_create_move_and_delete(self):
+        service = make_service(self.seller, category=self.design)
+        make_service(self.seller, category=self.design, title='Banner')
+        self.assertEqual(self.counts(), [2, 0])
+
+        service.category = self.writing
+        service.save()
+        self.assertEqual(self.counts(), [1, 1])
+
+        service.category = None
+        service.save()
+        self.assertEqual(self.counts(), [1, 0])
+
+        Service.objects.filter(category=self.design).delete()
+        self.assertEqual(self.counts(), [0, 0])
+
+    def test_reconcile_fixes_drift(self):
+        make_service(self.seller, category=self.design)
+        Category.objects.update(service_count=5)
+        call_command('reconcile_category_counts', stdout=StringIO())
+        self.assertEqual(self.counts(), [1, 0])
+
+
+class FacetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        seller = make_user('seller', 'seller')
+        self.design = Category.objects.create(name='Design')
+        writing = Category.objects.create(name='Writing')
+        make_service(seller, category=self.design, price=10, delivery_time=2)
+        make_service(seller, category=self.design, price=30, delivery_time=5)
+        make_service(seller, category=writing, price=600, delivery_time=40)
+
+    def test_facets_describe_the_filtered_list_in_one_query(self):
+        with self.assertNumQueries(1):
+            facets = compute_facets(Service.objects.filter(price__lt=100))
+        self.assertEqual(facets['categories'], [{'id': self.design.pk, 'name': 'Design', 'count': 2}])
+        self.assertEqual([bucket['count'] for bucket in facets['price']], [1, 1, 0, 0, 0, 0, 0])
+        self.assertEqual([bucket['count'] for bucket in facets['delivery_time']], [1, 1, 0, 0, 0])
+
+    def test_list_includes_facets_on_request(self):
+        data = APIClient().get('/api/v1/services/?facets=true').data
+        self.assertEqual([category['count'] for category in data['facets']['categories']], [2, 1])
+        self.assertEqual(data['facets']['price'][-1], {'label': '1000+', 'min': 1000, 'max': None, 'count': 0})
+        self.assertNotIn('facets', APIClient().get('/api/v1/services/').data)
+
+
+def png_upload(name='logo.png', size=(40, 30)):
+    content = BytesIO()
+    Image.new('RGB', size, 'red').save(content, 'PNG')
+    return SimpleUploadedFile(name, content.getvalue(), content_type='image/png')
+
+
+class ImagePipelineTests(TransactionTestCase):
+    def setUp(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root, ignore_errors=True)
+        settings_override = override_settings(
+            SERVICE_IMAGE_PROCESSING='sync',
+            SERVICE_IMAGE_SPOOL_ROOT=os.path.join(root, 'spool'),
+            SERVICE_IMAGE_STORAGE='django.core.files.storage.FileSystemStorage',
+            MEDIA_ROOT=os.path.join(root, 'media'),
+            MEDIA_URL='/media/',
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.service = make_service(make_user('seller', 'seller'))
+
+    def spooled_image(self, content):
+        source = images.spool_storage().save('uploads/broken.png', ContentFile(content))
+        return ServiceImage.objects.create(service=self.service, status=ServiceImage.PENDING, source=source)
+
+    def test_upload_is_rendered_and_published_after_commit(self):
+        response = APIClient().post(f'/api/v1/services/{self.service.pk}/images/', {'image': png_upload()}, format='multipart')
+        self.assertEqual(response.status_code, 201)
+        image = ServiceImage.objects.get(pk=response.data['id'])
+        self.assertEqual(image.status, ServiceImage.READY)
+        self.assertEqual(set(image.variants), {'large', 'medium', 'thumbnail'})
+        self.assertEqual(image.source, '')
+        self.assertEqual(os.listdir(images.spool_storage().path('uploads')), [])
+
+    def test_unreadable_uploads_are_marked_failed(self):
+        image = self.spooled_image(b'not an image')
+        images.process(image.pk)
+        image.refresh_from_db()
+        self.assertEqual(image.status, ServiceImage.FAILED)
+        self.assertTrue(image.error)
+
+    def test_worker_failures_are_marked_failed(self):
+        image = self.spooled_image(b'not an image')
+        crashed = Future()
+        crashed.set_exception(BrokenProcessPool('worker exited'))
+        images._publish_result(image.pk, crashed)
+        image.refresh_from_db()
+        self.assertEqual((image.status, image.error), (ServiceImage.FAILED, 'worker exited'))
+
+
+class ConditionalListTests(TestCase):
+    """A write made in one worker must change the ETag and body served by another."""
+
+    def setUp(self):
+        self.seller = make_user('seller', 'seller')
+        self.category = Category.objects.create(name='Design')
+
+    def create_service(self, title):
+        return make_service(self.seller, category=self.category, title=title)
+
+    def get(self, url, etag=None):
+        headers = {'HTTP_IF_NONE_MATCH': etag} if etag else {}
+        return APIClient().get(url, **headers)
+
+    def test_service_list_follows_writes_made_in_another_worker(self):
+        self.create_service('Logo')
+        with as_worker('a'):
+            first = self.get('/api/v1/services/')
+        with as_worker('b'):
+            self.create_service('Banner')
+        with as_worker('a'):
+            second = self.get('/api/v1/services/', first['ETag'])
+        self.assertEqual(second.status_code, 200)
+        self.assertNotEqual(second['ETag'], first['ETag'])
+        self.assertEqual(second.data['count'], 2)
+
+    def test_update_writes_move_the_service_etag(self):
+        service = self.create_service('Logo')
+        url = f'/api/v1/services/{service.pk}/'
+        with as_worker('a'):
+            first = self.get(url)
+        with as_worker('b'):
+            Service.objects.filter(pk=service.pk).update(rating_count=1, rating_avg=5.0)
+            invalidate_services([service.pk])
+        with as_worker('a'):
+            second = self.get(url, first['ETag'])
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.data['rating_count'], 1)
+
+    def test_category_list_follows_writes_made_in_another_worker(self):
+        with as_worker('a'):
+            first = self.get('/api/v1/categories/')
+        with as_worker('b'):
+            self.create_service('Logo')
+        with as_worker('a'):
+            second = self.get('/api/v1/categories/', first['ETag'])
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.data['results'][0]['service_count'], 1)
+
+    def test_cached_list_reads_one_counter(self):
+        self.create_service('Logo')
+        first = self.get('/api/v1/services/')
+        # The state behind both the ETag and the cache key is a single counter row.
+        with self.assertNumQueries(1):
+            self.assertEqual(self.get('/api/v1/services/', first['ETag']).status_code, 304)
+        with self.assertNumQueries(1):
+            self.assertEqual(self.get('/api/v1/services/').data, first.data)
+
+
+class CursorPaginationTests(TestCase):
+    def setUp(self):
+        self.seller = make_user('seller', 'seller')
+
+    def walk(self, url):
+        """Follow ``next`` links from ``url``; returns the ids in the order they were served."""
+        ids = []
+        while url:
+            response = APIClient().get(url)
+            self.assertEqual(response.status_code, 200)
+            ids += [item['id'] for item in response.data['results']]
+            url = response.data['next']
+        return ids
+
+    def test_models_without_created_at_are_paged_on_id(self):
+        categories = [Category.objects.create(name=f'Category {n}') for n in range(3)]
+        ids = self.walk('/api/v1/categories/?pagination=cursor&page_size=2')
+        self.assertEqual(ids, sorted((category.pk for category in categories), reverse=True))
+
+    def test_search_is_paged_by_rank(self):
+        weak = make_service(self.seller, title='Banner', description='a logo on request')
+        strong = make_service(self.seller, title='Logo logo', description='logo design')
+        middle = make_service(self.seller, title='Logo', description='clean vector art')
+        ranked = APIClient().get('/api/v1/services/?search=logo&page_size=10').data['results']
+        ids = self.walk('/api/v1/services/?search=logo&pagination=cursor&page_size=1')
+        self.assertEqual(ids, [item['id'] for item in ranked])
+        self.assertEqual(set(ids), {weak.pk, strong.pk, middle.pk})
+
+
+class FallbackSearchLimitTests(TestCase):
+    def setUp(self):
+        search.fallback_index.clear()
+        self.addCleanup(search.fallback_index.clear)
+        cache.clear()  # responses are cached per URL
+        seller = make_user('seller', 'seller')
+        for n in range(3):
+            make_service(seller, title=f'Logo {n}')
+
+    def test_capped_results_are_reported(self):
+        with mock.patch.object(search, 'FALLBACK_LIMIT', 2):
+            data = APIClient().get('/api/v1/services/?search=logo').data
+        self.assertEqual(data['count'], 2)
+        self.assertEqual(data['search_limit'], 2)
+
+    def test_uncapped_results_carry_no_limit(self):
+        data = APIClient().get('/api/v1/services/?search=logo').data
+        self.assertEqual(data['count'], 3)
+        self.assertNotIn('search_limit', data)
+
+
+class BulkImportTests(TestCase):
+    def setUp(self):
+        self.seller = make_user('seller', 'seller')
+        self.category = Category.objects.create(name='Design')
+        self.client = APIClient()
+        self.client.force_authenticate(self.seller)
+
+    def post(self, items):
+        return self.client.post('/api/v1/services/bulk/', items, format='json')
+
+    def test_creates_and_updates_in_one_request(self):
+        existing = make_service(self.seller)
+        response = self.post([
+            {'title': 'Banner', 'description': 'd', 'price': '9.50', 'delivery_time': 2, 'category': self.category.pk},
+            {'id': existing.pk, 'price': '7.00', 'category': self.category.pk},
+        ])
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual([result['action'] for result in response.data['results']], ['created', 'updated'])
+        existing.refresh_from_db()
+        self.assertEqual(str(existing.price), '7.00')
+        self.assertEqual(Service.objects.filter(seller=self.seller).count(), 2)
+        self.category.refresh_from_db()
+        self.assertEqual(self.category.service_count, 2)
+
+    def test_accepts_string_ids(self):
+        existing = make_service(self.seller)
+        response = self.post([{'id': str(existing.pk), 'title': 'Renamed'}])
+        self.assertEqual(response.status_code, 201)
+        existing.refresh_from_db()
+        self.assertEqual(existing.title, 'Renamed')
+
+    def test_rejects_foreign_and_malformed_ids_without_writing(self):
+        other = make_service(make_user('other', 'seller'))
+        response = self.post([
+            {'title': 'Banner', 'description': 'd', 'price': 5, 'delivery_time': 2},
+            {'id': other.pk, 'title': 'Mine now'},
+            {'id': 'x', 'title': 'Nope'},
+        ])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([error['index'] for error in response.data['errors']], [1, 2])
+        self.assertFalse(Service.objects.filter(seller=self.seller).exists())
@@ -3,35 +3,86 @@ from rest_framework.permissions import IsAuthenticated, AllowAny
 from django_filters.rest_framework import DjangoFilterBackend
 from .models import Service, Category, ServiceImage
 from .serializers import ServiceSerializer, CategorySerializer, ServiceImageSerializer
-from rest_framework.parsers import MultiPartParser, FormParser
+from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
+from rest_framework.decorators import action
+from rest_framework import status
 from rest_framework.viewsets import ModelViewSet
 from .permissions import IsAdminOrReadOnly
 from django.shortcuts import get_object_or_404
-from django.db.models import Count
 from services.permissions import IsAdminOrReadOnly
 from rest_framework.response import Response
 from services.customPagination import CustomPagination
+from services.filters import ServiceSearchFilter
+from services.cache import VersionedResponseCacheMixin, catalog_state, table_state
+from services.facets import FacetedListMixin
+from services import images
+from services.bulk import import_services, BULK_MAX_ITEMS
+from api.dynamic_fields import shape_queryset
+from api.conditional import ConditionalGetMixin, Stamp
 
-class ServiceViewSet(viewsets.ModelViewSet):
+class ServiceViewSet(ConditionalGetMixin, VersionedResponseCacheMixin, FacetedListMixin, viewsets.ModelViewSet):
     queryset = Service.objects.select_related('category', 'seller').prefetch_related('images').all()
     serializer_class = ServiceSerializer
     permission_classes = [IsAdminOrReadOnly]
-    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, filters.SearchFilter]
-    filterset_fields = ['category']
-    ordering_fields = ['price']
-    search_fields = ['title', 'description']
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, ServiceSearchFilter]
+    filterset_fields = {
+        'category': ['exact'],
+        'price': ['gte', 'lte'],
+        'delivery_time': ['gte', 'lte'],
+    }
+    ordering_fields = ['price', 'rating_avg', 'rating_count']
+    # search_rank exists while ?search= is active and leads the ordering unless ?ordering= is given.
+    keyset_fields = ['created_at', 'price', 'rating_avg', 'rating_count', 'search_rank']
     parser_classes = [MultiPartParser, FormParser]
     pagination_class = CustomPagination
 
+    def get_queryset(self):
+        return shape_queryset(super().get_queryset(), self.get_serializer_class(), self.request)
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        # Only the fallback search (no PostgreSQL) caps its matches; say so instead of dropping them silently.
+        search_limit = getattr(self.request, 'search_limit', None)
+        if search_limit is not None:
+            response.data['search_limit'] = search_limit
+        return response
+
+    def get_list_stamp(self, request):
+        return Stamp(*self.get_list_state(request))
+
+    def get_detail_stamp(self, request):
+        return Stamp(*self.get_detail_state(request))
+
     def perform_create(self, serializer):
         serializer.save(seller=self.request.user)
 
+    @action(detail=False, methods=['post'], parser_classes=[JSONParser], permission_classes=[IsAuthenticated])
+    def bulk(self, request):
+        """Create (no ``id``) or update (``id`` of an own service) many services at once."""
+        items = request.data
+        if not isinstance(items, list) or not items:
+            return Response({"error": "Expected a non-empty JSON array of services."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > BULK_MAX_ITEMS:
+            return Response({"error": f"At most {BULK_MAX_ITEMS} services per request."}, status=status.HTTP_400_BAD_REQUEST)
 
-class CategoryViewSet(viewsets.ModelViewSet):
-    queryset = Category.objects.annotate(service_count = Count('service')).all()
+        results, errors = import_services(request.user, items)
+        if errors:
+            return Response({"errors": errors}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({"results": results}, status=status.HTTP_201_CREATED)
+
+
+class CategoryViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
+    queryset = Category.objects.all()
     serializer_class = CategorySerializer
     permission_classes = [IsAdminOrReadOnly]
 
+    def get_list_stamp(self, request):
+        # Category writes and the service counts they carry all bump the catalog counter.
+        return Stamp(*catalog_state())
+
+    def get_detail_stamp(self, request):
+        return Stamp(*table_state(Category.objects.filter(pk=self.kwargs[self.lookup_field])))
+
 
 class ServiceImageViewSet(ModelViewSet):
     serializer_class = ServiceImageSerializer
@@ -42,4 +93,6 @@ class ServiceImageViewSet(ModelViewSet):
 
     def perform_create(self, serializer):
         service = get_object_or_404(Service, id=self.kwargs.get('service_pk'))
-        serializer.save(service=service)
+        upload = serializer.validated_data.pop('image')
+        image = serializer.save(service=service, status=ServiceImage.PENDING, source=images.spool_upload(upload))
+        images.schedule(image)
@@ -100,6 +100,25 @@ DATABASES = {
     }
 }
 
+# Local-memory by default, which is only coherent with a single worker. With
+# several workers point CACHE_BACKEND/CACHE_LOCATION at a shared cache, e.g.
+# CACHE_BACKEND=django.core.cache.backends.redis.RedisCache
+# CACHE_LOCATION=redis://127.0.0.1:6379/1
+# so cached responses, version counters, unread counts and purchase sets are
+# invalidated in every worker at once.
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='skillbridge'),
+    }
+}
+
+# With the local-memory cache, keys that other workers rely on for
+# invalidation expire after this many seconds (see api.caching).
+LOCAL_CACHE_TIMEOUT = 5
+
+SERVICE_CACHE_TIMEOUT = 300
+
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
     {'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator'},
@@ -119,22 +138,28 @@ REST_FRAMEWORK = {
     'DEFAULT_SCHEMA_CLASS': 'rest_framework.schemas.openapi.AutoSchema',
     'DEFAULT_FILTER_BACKENDS': ['django_filters.rest_framework.DjangoFilterBackend'],
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.CachedJWTAuthentication',
         'rest_framework.authentication.SessionAuthentication',
         'rest_framework.authentication.TokenAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS': 'services.customPagination.KeysetPageNumberPagination',
     'PAGE_SIZE': 10,
 }
 
 SIMPLE_JWT = {
     'AUTH_HEADER_TYPES': ('JWT',),
     "ACCESS_TOKEN_LIFETIME": timedelta(days=1),
+    # Adds role/is_staff claims for users.authentication.ClaimJWTAuthentication.
+    "TOKEN_OBTAIN_SERIALIZER": "users.serializers.RoleTokenObtainPairSerializer",
 }
 
+# users.authentication.CachedJWTAuthentication: per-process LRU of resolved users.
+AUTH_USER_CACHE_SIZE = 10000
+AUTH_USER_CACHE_TTL = 60
+
 CORS_ALLOWED_ORIGINS = [
     'http://localhost:5173',
     'https://skill-bridge-client.vercel.app',
@@ -157,6 +182,19 @@ cloudinary.config(
 
 DEFAULT_FILE_STORAGE = 'cloudinary_storage.storage.MediaCloudinaryStorage'
 
+CLOUDINARY_STORAGE = {
+    'CLOUD_NAME': config('cloud_name'),
+    'API_KEY': config('api_key'),
+    'API_SECRET': config('api_secret_key'),
+}
+
+# Service image pipeline (services.images). Use 'sync' processing and
+# django.core.files.storage.FileSystemStorage to run it without Cloudinary.
+SERVICE_IMAGE_STORAGE = 'cloudinary_storage.storage.MediaCloudinaryStorage'
+SERVICE_IMAGE_SPOOL_ROOT = BASE_DIR / 'media' / 'spool'
+SERVICE_IMAGE_WORKERS = 2
+SERVICE_IMAGE_PROCESSING = config('SERVICE_IMAGE_PROCESSING', default='process')
+
 # Djoser Config
 DJOSER = {
     'EMAIL': {
@@ -198,3 +236,39 @@ DOMAIN = FRONTEND_DOMAIN
 # Stripe Keys
 STRIPE_SECRET_KEY = config('STRIPE_SECRET_KEY')
 STRIPE_PUBLISHABLE_KEY = config('STRIPE_PUBLISHABLE_KEY')
+STRIPE_WEBHOOK_SECRET = config('STRIPE_WEBHOOK_SECRET', default='')
+STRIPE_WEBHOOK_TOLERANCE = 300
+
+# Checkout client (orders.stripe_client); use orders.stripe_client.FakeStripeGateway in tests.
+STRIPE_GATEWAY = 'orders.stripe_client.StripeGateway'
+STRIPE_TIMEOUT = 10
+STRIPE_MAX_NETWORK_RETRIES = 1
+STRIPE_POOL_SIZE = 10
+STRIPE_CIRCUIT_FAILURES = 5
+STRIPE_CIRCUIT_RESET = 30
+
+# Per-buyer purchase sets behind the has-ordered checks (orders.purchases).
+# Needs the shared cache above to be invalidated everywhere; with the
+# local-memory cache they are kept for LOCAL_CACHE_TIMEOUT instead.
+PURCHASE_CACHE_TIMEOUT = 60 * 60
+
+# Notifications older than this are moved to NotificationArchive by archive_notifications.
+NOTIFICATION_RETENTION_DAYS = 90
+
+# Push delivery (notifications.stream). The stream is only served by the ASGI
+# entry point (skillbridge.asgi); the Vercel deployment runs WSGI and answers it
+# with 503. PostgresBroker relays notifications from the process that wrote them
+# to the ASGI workers; InProcessBroker only works with a single process.
+NOTIFICATION_BROKER = 'notifications.broker.PostgresBroker'
+NOTIFICATION_STREAM_HEARTBEAT = 15
+# Seconds a token from /api/v1/notifications/stream-token/ can be used to open the stream.
+NOTIFICATION_STREAM_TOKEN_LIFETIME = 60
+
+# Cached unread counters (notifications.unread) are recounted at least this often
+# (every LOCAL_CACHE_TIMEOUT with the local-memory cache).
+NOTIFICATION_UNREAD_TIMEOUT = 300
+
+# Unread notifications about the same order merge into one row within this many seconds (0 disables).
+NOTIFICATION_COALESCE_WINDOW = 600
+# Stage notifications and deliver them with the send_notification_digests command instead of immediately.
+NOTIFICATION_DIGEST = False
@@ -0,0 +1,103 @@
+"""JWT authentication without a user query on every request.
+
+``CachedJWTAuthentication`` resolves the token's user through a bounded,
+per-process LRU with a TTL; ``users.signals`` evicts an entry whenever that
+user is saved (deactivation, password or role change) or deleted, and so
+does ``UserQuerySet.update()``, which sends no signals. The TTL bounds how
+long other processes can serve a stale copy.
+
+``ClaimJWTAuthentication`` skips the user lookup entirely and exposes the
+token's claims (id, role, is_staff) as a ``TokenUser``. Use it, through
+``CLAIM_AUTHENTICATION_CLASSES``, only on read endpoints that need nothing
+but those claims; they are as fresh as the token.
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework.authentication import SessionAuthentication, TokenAuthentication
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication, JWTStatelessUserAuthentication
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+
+class UserCache:
+    """Thread-safe LRU of user instances whose entries expire after ``ttl`` seconds."""
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            user, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+        # Every request gets its own copy, so nothing a view sets on request.user leaks into the cache.
+        return copy.copy(user)
+
+    def put(self, user_id, user):
+        with self._lock:
+            self._entries[user_id] = (copy.copy(user), time.monotonic() + self.ttl)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+user_cache = UserCache(
+    getattr(settings, 'AUTH_USER_CACHE_SIZE', 10000),
+    getattr(settings, 'AUTH_USER_CACHE_TTL', 60),
+)
+
+
+def evict_cached_users(*user_pks):
+    for user_pk in user_pks:
+        user_cache.invalidate(user_pk)
+    # Again after commit, in case a concurrent request cached the old row in between.
+    transaction.on_commit(lambda: [user_cache.invalidate(user_pk) for user_pk in user_pks])
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        user = user_cache.get(user_id) if user_id is not None else None
+        if user is None:
+            user = super().get_user(validated_token)
+            user_cache.put(user_id, user)
+            return user
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        if api_settings.CHECK_REVOKE_TOKEN and validated_token.get(
+            api_settings.REVOKE_TOKEN_CLAIM
+        ) != get_md5_hash_password(user.password):
+            raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+        return user
+
+
+class ClaimJWTAuthentication(JWTStatelessUserAuthentication):
+    """Authenticate from the token alone; ``request.user`` is a ``TokenUser``, so use ``request.user.pk``."""
+
+
+# For views that only read request.user.pk / .role / .is_staff.
+CLAIM_AUTHENTICATION_CLASSES = [ClaimJWTAuthentication, SessionAuthentication, TokenAuthentication]
@@ -1,7 +1,18 @@
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin, AbstractUser
 from django.db import models
 
-class CustomUserManager(BaseUserManager):
+class UserQuerySet(models.QuerySet):
+    def update(self, **kwargs):
+        # No post_save is sent here, so evict the cached copies users.signals would have.
+        from .authentication import evict_cached_users
+
+        user_pks = list(self.values_list('pk', flat=True))
+        updated = super().update(**kwargs)
+        evict_cached_users(*user_pks)
+        return updated
+
+
+class CustomUserManager(BaseUserManager.from_queryset(UserQuerySet)):
     def create_user(self, email, password=None, role='buyer', **extra_fields):
         if not email:
             raise ValueError("The Email field must be set")
@@ -1,3 +1,43 @@
+from django.contrib.auth import get_user_model
 from django.test import TestCase
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
 
-# Create your tests here.
+from api.testing import make_user
+from .authentication import user_cache
+
+
+class CachedUserTests(TestCase):
+    def setUp(self):
+        user_cache.clear()
+        self.addCleanup(user_cache.clear)
+        self.user = make_user('buyer')
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'JWT {AccessToken.for_user(self.user)}')
+
+    def get(self):
+        return self.client.get('/api/v1/orders/').status_code
+
+    def test_authenticated_requests_cache_the_user(self):
+        self.assertEqual(self.get(), 200)
+        self.assertIsNotNone(user_cache.get(self.user.pk))
+
+    def test_deactivation_evicts_the_cached_user(self):
+        self.assertEqual(self.get(), 200)
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.get(), 401)
+
+    def test_queryset_updates_evict_the_cached_user(self):
+        # update() sends no post_save; UserQuerySet evicts instead.
+        self.assertEqual(self.get(), 200)
+        get_user_model().objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertEqual(self.get(), 401)
+
+    def test_password_change_evicts_the_cached_user(self):
+        self.assertEqual(self.get(), 200)
+        self.user.set_password('new-pw12345!x')
+        self.user.save()
+        self.assertIsNone(user_cache.get(self.user.pk))
+        self.get()
+        self.assertEqual(user_cache.get(self.user.pk).password, self.user.password)
@@ -0,0 +1,12 @@
+from rest_framework_simplejwt.tokens import RefreshToken
+
+
+class RoleRefreshToken(RefreshToken):
+    """Refresh token whose access tokens also carry ``role`` and ``is_staff``, for claim-only auth."""
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token['role'] = user.role
+        token['is_staff'] = user.is_staff
+        return token
@@ -1,13 +1,14 @@
 from rest_framework import status, generics, permissions, viewsets
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import RefreshToken, AccessToken
+from rest_framework_simplejwt.tokens import AccessToken
 from django.contrib.auth import get_user_model
 from django.core.mail import send_mail
 from django.conf import settings
 from django.shortcuts import get_object_or_404
 from rest_framework.permissions import AllowAny, IsAuthenticated, IsAdminUser
 from django.contrib.auth import authenticate
+from .tokens import RoleRefreshToken
 from .serializers import CustomUserSerializer, LoginSerializer, CustomPasswordResetSerializer
 from orders.serializers import OrderSerializer
 from orders.models import Order
@@ -47,7 +48,7 @@ class LoginView(generics.GenericAPIView):
             return Response({"error": "Invalid Credentials"}, status=400)
 
         if user.check_password(password):
-            refresh = RefreshToken.for_user(user)
+            refresh = RoleRefreshToken.for_user(user)
             return Response({
                 "refresh": str(refresh),
                 "access": str(refresh.access_token),